@@ -5,6 +5,10 @@ import numpy as np
 
 from utils.data import fetch_prices, ASSET_CATEGORIES
 from utils.metrics import sharpe_ratio, max_drawdown
+from utils.diagnostics import diagnostics_panel, start_run
+from utils.profiling import stage
+
+start_run()
 
 st.set_page_config(page_title="AI Portfolio Optimizer", layout="wide")
 
@@ -33,7 +37,8 @@ col1, col2 = st.columns(2)
 
 with col1:
     fig_price = px.line(prices, title="Asset Price Trends")
-    st.plotly_chart(fig_price, use_container_width=True)
+    with stage("render: price trends"):
+        st.plotly_chart(fig_price, use_container_width=True)
 
 with col2:
     fig_corr = px.imshow(
@@ -41,7 +46,8 @@ with col2:
         text_auto=True,
         title="Asset Correlation Matrix"
     )
-    st.plotly_chart(fig_corr, use_container_width=True)
+    with stage("render: correlation matrix"):
+        st.plotly_chart(fig_corr, use_container_width=True)
 
 st.info(
 """
@@ -83,4 +89,10 @@ st.markdown(
 )
 
 fig = px.line(cumulative, title="📊 Portfolio Cumulative Growth")
-st.plotly_chart(fig, use_container_width=True)
+with stage("render: cumulative growth"):
+    st.plotly_chart(fig, use_container_width=True)
+
+# -----------------------------
+# DIAGNOSTICS
+# -----------------------------
+diagnostics_panel("home")
@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.suite import BENCHMARKS, Skip
+
+# -----------------------------
+# BENCHMARK RUNNER
+#   python -m benchmarks run [--quick] [--only env optimizer ...] [-o out.json]
+#   python -m benchmarks compare baseline.json current.json [--threshold 0.2]
+# Each case is called once to warm up, then timed `--repeat` times; the
+# median is what compare checks against the baseline.
+# -----------------------------
+REPEAT = 5
+THRESHOLD = 0.20  # relative slowdown of the median flagged as a regression
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _metadata(args):
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "quick": args.quick,
+        "repeat": args.repeat,
+    }
+
+
+def _time_case(case, repeat):
+    case.fn()  # warm-up: imports, caches, lazy allocations
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        case.fn()
+        times.append(time.perf_counter() - start)
+
+    times = np.array(times)
+    median = float(np.median(times))
+    return {
+        "params": case.params,
+        "repeat": repeat,
+        "min_s": float(times.min()),
+        "median_s": median,
+        "mean_s": float(times.mean()),
+        "std_s": float(times.std()),
+        "items": case.items,
+        "unit": case.unit,
+        f"{case.unit}s_per_s": case.items / median if median > 0 else None,
+    }
+
+
+def run(args):
+    if args.finbert_model:
+        import utils.finbert
+        utils.finbert.MODEL_ID = args.finbert_model
+
+    groups = args.only or list(BENCHMARKS)
+    unknown = set(groups) - set(BENCHMARKS)
+    if unknown:
+        sys.exit(f"Unknown benchmark group(s): {', '.join(sorted(unknown))}")
+
+    results = {}
+    for group in groups:
+        try:
+            for case in BENCHMARKS[group](args.quick):
+                result = _time_case(case, args.repeat)
+                results[case.name] = {"group": group, **result}
+                print(
+                    f"{case.name:<40} median {result['median_s'] * 1e3:10.3f} ms"
+                    f"  ({result[f'{case.unit}s_per_s']:,.0f} {case.unit}/s)"
+                )
+        except Skip as e:
+            results[f"{group}:skipped"] = {"group": group, "skipped": str(e)}
+            print(f"{group:<40} skipped: {e}")
+
+    report = {"meta": _metadata(args), "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    with open(args.current) as f:
+        current = json.load(f)["results"]
+
+    regressions = []
+    print(f"{'benchmark':<40} {'baseline ms':>12} {'current ms':>12} {'change':>8}  status")
+
+    for name in sorted(set(baseline) | set(current)):
+        old, new = baseline.get(name), current.get(name)
+        if old is None or new is None or "skipped" in old or "skipped" in new:
+            status = "new" if old is None else "missing" if new is None else "skipped"
+            print(f"{name:<40} {'':>12} {'':>12} {'':>8}  {status}")
+            continue
+
+        change = new["median_s"] / old["median_s"] - 1
+        if change > args.threshold:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif change < -args.threshold:
+            status = "improved"
+        else:
+            status = "ok"
+
+        print(
+            f"{name:<40} {old['median_s'] * 1e3:12.3f} {new['median_s'] * 1e3:12.3f}"
+            f" {change:+8.1%}  {status}"
+        )
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print("\nNo regressions.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="run the suite and write JSON results")
+    p_run.add_argument("--quick", action="store_true", help="smaller sizes for smoke runs")
+    p_run.add_argument("--only", nargs="+", metavar="GROUP", help=f"subset of: {', '.join(BENCHMARKS)}")
+    p_run.add_argument("--repeat", type=int, default=REPEAT)
+    p_run.add_argument("-o", "--output", default="benchmark_results.json")
+    p_run.add_argument("--finbert-model", default=None, help="local FinBERT path instead of the hub id")
+    p_run.set_defaults(func=run)
+
+    p_cmp = sub.add_parser("compare", help="flag regressions against a baseline")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("--threshold", type=float, default=THRESHOLD)
+    p_cmp.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# BENCHMARK CASES
+# Every benchmark is a generator of Case objects built on synthetic data
+# only (no network, no files). `quick` shrinks the sizes for smoke runs.
+# Cases whose dependencies are missing are reported as skipped.
+# -----------------------------
+SEED = 0
+
+
+class Case:
+    def __init__(self, name, fn, items=1, unit="call", **params):
+        self.name = name
+        self.fn = fn
+        self.items = items  # work units per fn() call, for throughput
+        self.unit = unit
+        self.params = params
+
+
+class Skip(Exception):
+    pass
+
+
+def synthetic_returns(n_days, n_assets, seed=SEED):
+    # Correlated daily returns: one market factor plus idiosyncratic noise
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0004, 0.01, (n_days, 1))
+    beta = rng.uniform(0.5, 1.5, n_assets)
+    values = market * beta + rng.normal(0.0002, 0.012, (n_days, n_assets))
+
+    return pd.DataFrame(
+        values,
+        index=pd.bdate_range("2000-01-03", periods=n_days),
+        columns=[f"A{i}" for i in range(n_assets)]
+    )
+
+
+def _untrained_agent(returns, window):
+    # Policy inference cost does not depend on the weights, so a freshly
+    # initialised PPO stands in for the saved agent
+    try:
+        from stable_baselines3 import PPO
+        from rl.vec_env_portfolio import PortfolioVecEnv
+    except ImportError as e:
+        raise Skip(str(e))
+
+    env = PortfolioVecEnv(np.asarray(returns), num_envs=1, window=window, seed=SEED)
+    return PPO("MlpPolicy", env, seed=SEED, device="cpu")
+
+
+# -----------------------------
+# RL ENVIRONMENT
+# -----------------------------
+def bench_env(quick):
+    from rl.env_portfolio import PortfolioEnv
+
+    returns = synthetic_returns(1260 if quick else 5040, 4).values
+    n_steps = 1000 if quick else 4000
+    action = np.full(4, 0.25, dtype=np.float32)
+
+    def init():
+        PortfolioEnv(returns)
+
+    env = PortfolioEnv(returns)
+
+    def episode():
+        env.reset()
+        for _ in range(n_steps):
+            env.step(action)
+
+    yield Case("env_init", init, n_days=len(returns), n_assets=4)
+    yield Case("env_reset_step", episode, items=n_steps, unit="step", n_days=len(returns), n_assets=4)
+
+
+def bench_observations(quick):
+    from utils.rolling_stats import RollingWindowStats, rolling_observations
+
+    for n_assets in (4, 50):
+        returns = synthetic_returns(2520 if quick else 10_080, n_assets).values
+        yield Case(
+            f"rolling_observations_n{n_assets}",
+            lambda r=returns: rolling_observations(r, 20),
+            items=len(returns) - 19,
+            unit="obs",
+            n_days=len(returns),
+            n_assets=n_assets
+        )
+
+        def incremental(r=returns):
+            stats = RollingWindowStats(r.shape[1], 20)
+            for row in r:
+                stats.push(row)
+                if stats.full:
+                    stats.observation()
+
+        yield Case(
+            f"rolling_stats_incremental_n{n_assets}",
+            incremental,
+            items=len(returns),
+            unit="obs",
+            n_days=len(returns),
+            n_assets=n_assets
+        )
+
+
+# -----------------------------
+# RL INFERENCE / BACKTESTS
+# -----------------------------
+def bench_rl_inference(quick):
+    from utils.backtest import backtest_rl
+    from utils.rl_inference import N_ASSETS, WINDOW, get_rl_weights
+
+    returns = synthetic_returns(2520 if quick else 10_080, N_ASSETS)
+    agent = _untrained_agent(returns, WINDOW)
+    recent = returns.iloc[-60:]
+
+    yield Case("get_rl_weights", lambda: get_rl_weights(agent, recent), n_assets=N_ASSETS)
+    yield Case(
+        "backtest_rl",
+        lambda: backtest_rl(agent, returns, window=WINDOW),
+        items=len(returns),
+        unit="day",
+        n_days=len(returns),
+        n_assets=N_ASSETS
+    )
+
+
+def bench_backtest_static(quick):
+    from utils.backtest import backtest_static
+
+    for n_assets in (4, 100):
+        returns = synthetic_returns(10_080 if quick else 100_800, n_assets)
+        weights = np.full(n_assets, 1 / n_assets)
+        yield Case(
+            f"backtest_static_n{n_assets}",
+            lambda r=returns, w=weights: backtest_static(w, r),
+            items=len(returns),
+            unit="day",
+            n_days=len(returns),
+            n_assets=n_assets
+        )
+
+
+# -----------------------------
+# OPTIMIZATION / SIMULATION
+# -----------------------------
+def bench_optimizer(quick):
+    from utils.optimizer import mean_variance_opt
+
+    for n_assets in ((10, 50, 200) if quick else (10, 50, 200, 500, 1000)):
+        returns = synthetic_returns(756, n_assets)
+        yield Case(
+            f"mean_variance_opt_n{n_assets}",
+            lambda r=returns: mean_variance_opt(r),
+            n_days=len(returns),
+            n_assets=n_assets
+        )
+
+
+def bench_monte_carlo(quick):
+    from utils.monte_carlo import monte_carlo_simulation
+
+    returns = synthetic_returns(756, 10)
+    weights = np.full(10, 0.1)
+
+    for n_sims in ((1_000, 10_000) if quick else (1_000, 10_000, 100_000)):
+        yield Case(
+            f"monte_carlo_{n_sims}",
+            lambda n=n_sims: monte_carlo_simulation(returns, weights, n_sims=n, seed=SEED),
+            items=n_sims,
+            unit="path",
+            n_sims=n_sims,
+            horizon=252,
+            n_assets=10
+        )
+
+
+# -----------------------------
+# FINBERT
+# -----------------------------
+def bench_finbert(quick):
+    try:
+        from utils.finbert import load_finbert, predict_sentiment
+    except ImportError as e:
+        raise Skip(str(e))
+
+    rng = np.random.default_rng(SEED)
+    words = (
+        "shares surge after earnings beat guidance revenue margin outlook "
+        "lawsuit regulator cuts rating downgrade upgrade record quarter demand"
+    ).split()
+    texts = [
+        " ".join(rng.choice(words, size=rng.integers(6, 40)))
+        for _ in range(64 if quick else 512)
+    ]
+
+    for quantize in (False, True):
+        try:
+            tokenizer, model = load_finbert(quantize=quantize)
+        except Exception as e:  # model weights not cached locally / no network
+            raise Skip(f"FinBERT unavailable: {e}")
+
+        yield Case(
+            f"finbert_{'int8' if quantize else 'fp32'}",
+            lambda t=tokenizer, m=model: predict_sentiment(texts, t, m),
+            items=len(texts),
+            unit="text",
+            n_texts=len(texts)
+        )
+
+
+# -----------------------------
+# COLD START
+# Fresh-interpreter import of the modules behind each page, including
+# interpreter startup; a heavy import creeping back in shows up here.
+# -----------------------------
+STARTUP_MODULES = (
+    "utils.data",
+    "utils.optimizer",
+    "utils.rl_inference",
+    "utils.finbert",
+    "utils.sentiment_index",
+    "utils.news",
+)
+
+
+def bench_startup(quick):
+    from utils.import_timing import import_time
+
+    for module in STARTUP_MODULES[:2] if quick else STARTUP_MODULES:
+        if "error" in import_time(module):
+            continue  # dependency not installed here
+        yield Case(f"import_{module.split('.')[-1]}", lambda m=module: import_time(m), module=module)
+
+
+BENCHMARKS = {
+    "env": bench_env,
+    "observations": bench_observations,
+    "rl_inference": bench_rl_inference,
+    "backtest_static": bench_backtest_static,
+    "optimizer": bench_optimizer,
+    "monte_carlo": bench_monte_carlo,
+    "finbert": bench_finbert,
+    "startup": bench_startup,
+}
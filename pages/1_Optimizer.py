@@ -3,8 +3,12 @@ import plotly.express as px
 import pandas as pd
 
 from utils.data import fetch_prices, ASSET_CATEGORIES
-from utils.optimizer import mean_variance_opt
+from utils.optimizer import mean_variance_opt, mean_variance_frontier
 from utils.metrics import sharpe_ratio, max_drawdown
+from utils.diagnostics import diagnostics_panel, start_run
+from utils.profiling import stage
+
+start_run()
 
 st.title("⚙️ Mean–Variance Portfolio Optimizer")
 
@@ -30,10 +34,17 @@ tickers = st.multiselect(
 prices = fetch_prices(tickers)
 returns = prices.pct_change().dropna()
 
+cov_method = st.selectbox(
+    "Covariance Estimator",
+    ["sample", "ledoit_wolf", "factor"],
+    help="Ledoit–Wolf shrinkage and the PCA factor model stay well-conditioned "
+         "for large universes or short histories."
+)
+
 # -----------------------------
 # OPTIMIZATION
 # -----------------------------
-weights = mean_variance_opt(returns)
+weights = mean_variance_opt(returns, cov_method=cov_method)
 
 weights_df = pd.DataFrame({
     "Asset": tickers,
@@ -48,7 +59,35 @@ fig = px.pie(
     values=weights,
     title="Mean–Variance Optimized Weights"
 )
-st.plotly_chart(fig)
+with stage("render: allocation pie"):
+    st.plotly_chart(fig)
+
+# -----------------------------
+# EFFICIENT FRONTIER
+# -----------------------------
+frontier_weights, frontier_risk, frontier_return = mean_variance_frontier(
+    returns, n_points=100, cov_method=cov_method
+)
+
+fig_frontier = px.line(
+    x=frontier_risk,
+    y=frontier_return,
+    labels={"x": "Annualized Volatility", "y": "Annualized Return"},
+    title="Efficient Frontier (Long-Only)"
+)
+fig_frontier.add_scatter(
+    x=frontier_risk[:1],
+    y=frontier_return[:1],
+    mode="markers",
+    name="Minimum Variance"
+)
+with stage("render: efficient frontier"):
+    st.plotly_chart(fig_frontier, use_container_width=True)
+
+st.caption(
+    "Each point is the lowest-risk portfolio for a given appetite for return; "
+    "the marker is the minimum-variance allocation shown above."
+)
 
 # -----------------------------
 # EXPLANATION
@@ -100,3 +139,8 @@ Mean–Variance Optimization produces a **stable, low-risk baseline**.
 It does **not adapt** to market regime changes — this is where RL helps.
 """
 )
+
+# -----------------------------
+# DIAGNOSTICS
+# -----------------------------
+diagnostics_panel("optimizer")
@@ -1,9 +1,13 @@
 import streamlit as st
 import numpy as np
-import pandas as pd
 import plotly.express as px
 
 from utils.data import fetch_prices, ASSET_CATEGORIES
+from utils.monte_carlo import simulate_nav_stats
+from utils.diagnostics import diagnostics_panel, start_run
+from utils.profiling import stage
+
+start_run()
 
 st.set_page_config(layout="wide")
 st.title("⚠️ Advanced Risk Analyzer")
@@ -91,7 +95,8 @@ fig_dist.add_vline(
     annotation_position="bottom left"
 )
 
-st.plotly_chart(fig_dist, use_container_width=True)
+with stage("render: return distribution"):
+    st.plotly_chart(fig_dist, use_container_width=True)
 
 st.info(
 """
@@ -127,7 +132,8 @@ fig_stress = px.line(
     stress_nav,
     title=f"Portfolio Performance Under: {scenario}"
 )
-st.plotly_chart(fig_stress, use_container_width=True)
+with stage("render: stress test"):
+    st.plotly_chart(fig_stress, use_container_width=True)
 
 st.info(
 """
@@ -142,29 +148,34 @@ st.info(
 # =====================================================
 st.subheader("🎲 Monte Carlo Risk Projection")
 
-n_sims = st.slider("Number of Simulations", 200, 2000, 500, step=100)
+n_sims = st.select_slider(
+    "Number of Simulations",
+    options=[500, 2_000, 10_000, 100_000, 1_000_000],
+    value=10_000
+)
 
 mu = portfolio_returns.mean()
 sigma = portfolio_returns.std()
 
-sim_returns = np.random.normal(mu, sigma, (252, n_sims))
-sim_nav = (1 + sim_returns).cumprod(axis=0)
-
-percentiles = np.percentile(sim_nav, [5, 25, 50, 75, 95], axis=1)
+# Paths are streamed in chunks into per-day histograms, so memory stays
+# bounded however many simulations are requested. The seeded result is
+# cached, so other widgets (confidence, stress scenario) do not re-simulate.
+with stage("monte carlo: simulate + accumulate"):
+    path_stats = simulate_nav_stats(mu, sigma, n_sims, horizon=252)
 
-fan_df = pd.DataFrame({
-    "P5": percentiles[0],
-    "P25": percentiles[1],
-    "Median": percentiles[2],
-    "P75": percentiles[3],
-    "P95": percentiles[4]
-})
+fan_df = path_stats.fan()
+sim_VaR, sim_CVaR = path_stats.terminal_var_cvar(confidence)
 
 fig_fan = px.line(
     fan_df,
     title="Monte Carlo Fan Chart (1-Year Horizon)"
 )
-st.plotly_chart(fig_fan, use_container_width=True)
+with stage("render: fan chart"):
+    st.plotly_chart(fig_fan, use_container_width=True)
+
+col1, col2 = st.columns(2)
+col1.metric("1-Year Simulated VaR", f"{sim_VaR*100:.2f}%")
+col2.metric("1-Year Simulated CVaR", f"{sim_CVaR*100:.2f}%")
 
 st.info(
 """
@@ -190,3 +201,8 @@ st.success(
 Together, these provide a **holistic view of portfolio risk**.
 """
 )
+
+# -----------------------------
+# DIAGNOSTICS
+# -----------------------------
+diagnostics_panel("risk_analyzer")
@@ -2,11 +2,18 @@ import os
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import requests
 from dotenv import load_dotenv
 
 from utils.data import ASSET_CATEGORIES
-from utils.news import fetch_news
+from utils.news import fetch_news_bulk
 from utils.finbert import load_finbert, predict_sentiment
+from utils.sentiment_cache import SentimentCache
+from utils.sentiment_index import load_sentiment_index
+from utils.diagnostics import diagnostics_panel, start_run
+from utils.profiling import stage
+
+start_run()
 
 # -----------------------------
 # LOAD ENV VARIABLES
@@ -46,14 +53,27 @@ ticker = st.selectbox("Select Ticker", ASSET_CATEGORIES[category])
 # -----------------------------
 @st.cache_resource
 def load_model():
-    return load_finbert()
+    return load_finbert(quantize=True)
 
 tokenizer, model = load_model()
 
+@st.cache_resource
+def load_sentiment_cache():
+    return SentimentCache()
+
+sentiment_cache = load_sentiment_cache()
+
 # -----------------------------
 # FETCH NEWS
 # -----------------------------
-articles = fetch_news(ticker, news_api_key)
+# The whole category is fetched concurrently; the selected ticker's
+# articles drive the detail view, the rest the category overview below
+try:
+    category_news = fetch_news_bulk(ASSET_CATEGORIES[category], news_api_key)
+except requests.HTTPError as e:
+    st.error(f"News API request failed: {e}. Check NEWS_API_KEY.")
+    st.stop()
+articles = category_news[ticker]
 
 if not articles:
     st.warning("No recent news found for this ticker.")
@@ -64,7 +84,7 @@ texts = [
     for a in articles
 ]
 
-sentiments, probs = predict_sentiment(texts, tokenizer, model)
+sentiments, probs = predict_sentiment(texts, tokenizer, model, cache=sentiment_cache)
 
 # -----------------------------
 # DISPLAY NEWS + SENTIMENT
@@ -114,7 +134,55 @@ fig = px.bar(
     color="Sentiment"
 )
 
-st.plotly_chart(fig, use_container_width=True)
+with stage("render: sentiment counts"):
+    st.plotly_chart(fig, use_container_width=True)
+
+# -----------------------------
+# CATEGORY SENTIMENT
+# -----------------------------
+category_rows = []
+for t, t_articles in category_news.items():
+    if not t_articles:
+        continue
+    _, t_probs = predict_sentiment(
+        [a["title"] + ". " + (a["description"] or "") for a in t_articles],
+        tokenizer,
+        model,
+        cache=sentiment_cache
+    )
+    category_rows.append({
+        "Ticker": t,
+        "Net Sentiment": float((t_probs[:, 2] - t_probs[:, 0]).mean()),
+        "Articles": len(t_articles)
+    })
+
+if category_rows:
+    fig_cat = px.bar(
+        pd.DataFrame(category_rows),
+        x="Ticker",
+        y="Net Sentiment",
+        hover_data=["Articles"],
+        title=f"🌐 Net News Sentiment across {category} (Positive − Negative)"
+    )
+    with stage("render: category sentiment"):
+        st.plotly_chart(fig_cat, use_container_width=True)
+
+# -----------------------------
+# SENTIMENT HISTORY (from `python -m utils.sentiment_index`)
+# -----------------------------
+sentiment_index = load_sentiment_index()
+
+if sentiment_index is not None and (sentiment_index["ticker"] == ticker).any():
+    history = sentiment_index[sentiment_index["ticker"] == ticker]
+
+    fig_hist = px.line(
+        history,
+        x="date",
+        y=["mean", "ewm"],
+        title=f"📈 Daily News Sentiment Index for {ticker}"
+    )
+    with stage("render: sentiment history"):
+        st.plotly_chart(fig_hist, use_container_width=True)
 
 # -----------------------------
 # EXPLANATION
@@ -135,3 +203,8 @@ st.info(
 ⚠️ News sentiment should always be used **alongside technical and risk analysis**.
 """
 )
+
+# -----------------------------
+# DIAGNOSTICS
+# -----------------------------
+diagnostics_panel("news_sentiment")
@@ -2,7 +2,12 @@ import streamlit as st
 import plotly.express as px
 
 from utils.data import fetch_prices
-from utils.rl_inference import load_rl_agent, get_rl_weights
+from utils.rl_inference import get_rl_weights
+from utils.model_registry import get_registry
+from utils.diagnostics import diagnostics_panel, start_run
+from utils.profiling import stage
+
+start_run()
 
 st.set_page_config(layout="wide")
 st.title("🔁 Reinforcement Learning Portfolio Rebalancer")
@@ -12,24 +17,38 @@ st.markdown(
 This agent was **trained offline using PPO** to maximize **risk-adjusted returns**
 while penalizing drawdowns and transaction costs.
 
-⚠️ The asset universe is fixed to ensure a consistent RL state space.
+⚠️ Each agent is tied to the asset universe it was trained on, to ensure a consistent RL state space.
 """
 )
 
-RL_TICKERS = ["AAPL", "MSFT", "GOOGL", "NVDA"]
+# -----------------------------
+# MODEL / UNIVERSE
+# -----------------------------
+registry = get_registry()
+models = {entry.name: entry for entry in registry.entries() if not entry.n_features}
+if not models:
+    st.error(f"No RL models registered in {registry.path}")
+    st.stop()
+
+model = models[st.selectbox(
+    "Agent (asset universe)",
+    list(models),
+    format_func=lambda name: f"{name} — {', '.join(models[name].tickers)}"
+)]
 
-prices = fetch_prices(RL_TICKERS)
-returns = prices.pct_change().dropna().values
+prices = fetch_prices(model.tickers)
+returns = prices[model.tickers].pct_change().dropna().values
 
-agent = load_rl_agent()
-weights = get_rl_weights(agent, returns)
+agent = registry.load(model)
+weights = get_rl_weights(agent, returns, window=model.window)
 
 fig = px.pie(
-    names=RL_TICKERS,
+    names=model.tickers,
     values=weights,
     title="RL-Optimized Allocation (Sharpe-Aware)"
 )
-st.plotly_chart(fig, use_container_width=True)
+with stage("render: allocation pie"):
+    st.plotly_chart(fig, use_container_width=True)
 
 st.info(
 """
@@ -43,3 +62,8 @@ st.info(
 This mirrors institutional portfolio strategies.
 """
 )
+
+# -----------------------------
+# DIAGNOSTICS
+# -----------------------------
+diagnostics_panel("rl_rebalancer")
@@ -4,8 +4,13 @@ import pandas as pd
 import plotly.express as px
 
 from utils.data import fetch_prices
-from utils.optimizer import mean_variance_opt
-from utils.rl_inference import load_rl_agent, get_rl_weights
+from utils.backtest import backtest_walk_forward
+from utils.rl_inference import get_rl_weights_batch
+from utils.model_registry import get_registry
+from utils.diagnostics import diagnostics_panel, start_run
+from utils.profiling import stage
+
+start_run()
 
 # -----------------------------
 # CONFIG
@@ -23,12 +28,27 @@ Both strategies are evaluated on the **same assets, same time period, and same m
 )
 
 # -----------------------------
-# FIXED ASSET UNIVERSE (IMPORTANT)
+# ASSET UNIVERSE (IMPORTANT)
+# Fixed by the RL agent being compared: its registered tickers
 # -----------------------------
-TICKERS = ["AAPL", "MSFT", "GOOGL", "NVDA"]
+MVO_LOOKBACK = 60      # trailing days used for each mean–variance fit
+MVO_REBALANCE = 21     # re-fit roughly monthly
+
+registry = get_registry()
+models = {entry.name: entry for entry in registry.entries() if not entry.n_features}
+if not models:
+    st.error(f"No RL models registered in {registry.path}")
+    st.stop()
+
+model = models[st.selectbox(
+    "RL agent (asset universe)",
+    list(models),
+    format_func=lambda name: f"{name} — {', '.join(models[name].tickers)}"
+)]
+TICKERS = model.tickers
 
 prices = fetch_prices(TICKERS)
-returns = prices.pct_change().dropna()
+returns = prices[TICKERS].pct_change().dropna()
 returns_np = returns.values
 
 # -----------------------------
@@ -55,27 +75,37 @@ def compute_metrics(portfolio_returns):
 # =====================================================
 # 1️⃣ MEAN–VARIANCE BACKTEST
 # =====================================================
-mvo_weights = mean_variance_opt(returns)
-mvo_port_returns = returns @ mvo_weights
-mvo_metrics = compute_metrics(mvo_port_returns)
+# Walk-forward: re-fit on trailing data only, so there is no look-ahead
+mvo_backtest = backtest_walk_forward(
+    returns,
+    lookback=MVO_LOOKBACK,
+    rebalance_every=MVO_REBALANCE
+)
+mvo_weights_df = mvo_backtest["Weights"]
 
 # =====================================================
 # 2️⃣ RL BACKTEST (DYNAMIC REBALANCING)
 # =====================================================
-agent = load_rl_agent()
+agent = registry.load(model)
 
-rl_weights_series = []
-for t in range(20, len(returns_np)):
-    weights_t = get_rl_weights(agent, returns_np[:t])
-    rl_weights_series.append(weights_t)
+# One batched forward pass over every day (last row = next-day allocation)
+rl_weights_series = get_rl_weights_batch(agent, returns_np, window=model.window)[:-1]
 
 rl_weights_df = pd.DataFrame(
     rl_weights_series,
-    columns=TICKERS,
-    index=returns.index[20:]
+    columns=returns.columns,
+    index=returns.index[model.window:]
 )
 
-rl_port_returns = (rl_weights_df * returns.loc[rl_weights_df.index]).sum(axis=1)
+# Evaluate both strategies over the same dates: each starts after its own
+# lookback (MVO_LOOKBACK, the model's window), so keep the days both cover
+dates = rl_weights_df.index.intersection(mvo_weights_df.index)
+mvo_weights_df = mvo_weights_df.loc[dates]
+rl_weights_df = rl_weights_df.loc[dates]
+
+mvo_port_returns = (mvo_weights_df * returns.loc[dates]).sum(axis=1)
+mvo_metrics = compute_metrics(mvo_port_returns)
+rl_port_returns = (rl_weights_df * returns.loc[dates]).sum(axis=1)
 rl_metrics = compute_metrics(rl_port_returns)
 
 # =====================================================
@@ -147,7 +177,8 @@ fig = px.line(
     title="Equity Curves: RL vs Mean–Variance",
     labels={"value": "Portfolio Value", "index": "Date"}
 )
-st.plotly_chart(fig, use_container_width=True)
+with stage("render: equity curves"):
+    st.plotly_chart(fig, use_container_width=True)
 
 # =====================================================
 # 6️⃣ FINAL INTERPRETATION (JUDGE-SAFE)
@@ -159,7 +190,7 @@ st.info(
 - **Mean–Variance Optimization**
   - Higher raw Sharpe
   - Larger drawdowns
-  - Static allocation
+  - Monthly re-fit on trailing data only
 
 - **Reinforcement Learning**
   - Lower drawdowns
@@ -171,3 +202,8 @@ RL trades some return for **significantly better downside protection**, which is
 preferred in real-world portfolio management.
 """
 )
+
+# -----------------------------
+# DIAGNOSTICS
+# -----------------------------
+diagnostics_panel("model_comparison")
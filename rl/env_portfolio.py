@@ -1,6 +1,11 @@
 import gymnasium as gym
 import numpy as np
 
+from utils.features import as_feature_array, feature_dim, feature_observations
+from utils.rolling_stats import rolling_observations
+from utils.shared_arrays import SharedEnvData, open_array
+
+
 class PortfolioEnv(gym.Env):
     metadata = {"render_modes": []}
 
@@ -9,10 +14,23 @@ class PortfolioEnv(gym.Env):
         returns,
         window=20,
         lambda_dd=0.05,
-        lambda_tc=0.002
+        lambda_tc=0.002,
+        features=None,
+        rolling=None
     ):
         super().__init__()
 
+        # `returns` may be an array, a .npy path (memory-mapped), a
+        # SharedArray, or a SharedEnvData carrying the rolling arrays too,
+        # so subprocess workers can all attach to one read-only copy
+        if isinstance(returns, SharedEnvData):
+            if returns.window != window:
+                raise ValueError(
+                    f"Shared data was built for window={returns.window}, not {window}"
+                )
+            returns, rolling = returns.returns, returns.rolling
+        returns = open_array(returns)
+
         self.returns = returns
         self.window = window
         self.lambda_dd = lambda_dd
@@ -20,6 +38,10 @@ class PortfolioEnv(gym.Env):
 
         self.n_assets = returns.shape[1]
 
+        # Optional (T, n_assets, n_channels) array or .npy path, memory-mapped
+        # and appended to each observation (see utils.features)
+        self.features = as_feature_array(features, len(returns), self.n_assets)
+
         # Action: portfolio weights
         self.action_space = gym.spaces.Box(
             low=0.0, high=1.0, shape=(self.n_assets,), dtype=np.float32
@@ -30,12 +52,25 @@ class PortfolioEnv(gym.Env):
             self.n_assets * window     # rolling returns
             + self.n_assets             # volatility
             + self.n_assets ** 2        # correlation
+            + feature_dim(self.features)  # extra features
         )
 
         self.observation_space = gym.spaces.Box(
             low=-np.inf, high=np.inf, shape=(self.obs_dim,), dtype=np.float32
         )
 
+        # Every observation (and the rolling mean / covariance used by the
+        # Sharpe reward) is built once here; step/reset only index into it.
+        # Shared rolling observations may already carry the features.
+        if rolling is None:
+            self._obs, self._mean, self._cov = rolling_observations(
+                np.asarray(returns, dtype=np.float64), window
+            )
+        else:
+            self._obs, self._mean, self._cov = (open_array(a) for a in rolling)
+        if self._obs.shape[1] != self.obs_dim:
+            self._obs = feature_observations(self._obs, self.features, window)
+
     def reset(self, seed=None):
         self.t = self.window
         self.nav = 1.0
@@ -44,18 +79,7 @@ class PortfolioEnv(gym.Env):
         return self._get_obs(), {}
 
     def _get_obs(self):
-        window_returns = self.returns[self.t - self.window : self.t]
-
-        vol = window_returns.std(axis=0)
-        corr = np.corrcoef(window_returns.T)
-
-        obs = np.concatenate([
-            window_returns.flatten(),
-            vol,
-            corr.flatten()
-        ])
-
-        return obs.astype(np.float32)
+        return self._obs[self.t - self.window]
 
     def step(self, action):
         action = np.clip(action, 0, 1)
@@ -69,11 +93,9 @@ class PortfolioEnv(gym.Env):
         turnover = np.sum((weights - self.prev_weights) ** 2)
     
         # ✅ portfolio sharpe
-        recent = self.returns[self.t - self.window : self.t]
-        port_recent = recent @ weights
-    
-        mean_ret = port_recent.mean()
-        std_ret = port_recent.std() + 1e-8
+        k = self.t - self.window
+        mean_ret = self._mean[k] @ weights
+        std_ret = np.sqrt(max(weights @ self._cov[k] @ weights, 0.0)) + 1e-8
         sharpe_t = mean_ret / std_ret
     
         reward = (
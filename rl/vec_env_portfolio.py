@@ -0,0 +1,170 @@
+import gymnasium as gym
+import numpy as np
+from stable_baselines3.common.vec_env import VecEnv
+
+from utils.features import as_feature_array, feature_observations
+from utils.rolling_stats import rolling_observations
+
+
+# N independent PortfolioEnv episodes stepped together as array operations.
+# Rewards, observations and termination match PortfolioEnv; episodes can
+# additionally start at random offsets and be truncated after
+# `episode_length` steps.
+class PortfolioVecEnv(VecEnv):
+    def __init__(
+        self,
+        returns,
+        num_envs=64,
+        window=20,
+        lambda_dd=0.05,
+        lambda_tc=0.002,
+        random_start=True,
+        episode_length=None,
+        seed=None,
+        features=None
+    ):
+        self.returns = np.asarray(returns, dtype=np.float64)
+        self.window = window
+        self.lambda_dd = lambda_dd
+        self.lambda_tc = lambda_tc
+        self.random_start = random_start
+        self.episode_length = episode_length
+
+        self.n_assets = self.returns.shape[1]
+        self.last_t = len(self.returns) - 1
+
+        if self.last_t - window < 1:
+            raise ValueError(
+                f"Need more than {window + 1} rows of returns, got {len(self.returns)}"
+            )
+
+        self._obs, self._mean, self._cov = rolling_observations(self.returns, window)
+        self.features = as_feature_array(features, len(self.returns), self.n_assets)
+        self._obs = feature_observations(self._obs, self.features, window)
+        self.obs_dim = self._obs.shape[1]
+
+        # Same spaces as PortfolioEnv, so agents trained on either are interchangeable
+        super().__init__(
+            num_envs,
+            gym.spaces.Box(
+                low=-np.inf, high=np.inf, shape=(self.obs_dim,), dtype=np.float32
+            ),
+            gym.spaces.Box(
+                low=0.0, high=1.0, shape=(self.n_assets,), dtype=np.float32
+            ),
+        )
+
+        self._rng = np.random.default_rng(seed)
+        self._actions = None
+
+        self.t = np.full(num_envs, window)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.nav = np.ones(num_envs)
+        self.max_nav = np.ones(num_envs)
+        self.prev_weights = np.full((num_envs, self.n_assets), 1.0 / self.n_assets)
+
+    # -----------------------------
+    # EPISODE BOOKKEEPING
+    # -----------------------------
+    def _start_offsets(self, n):
+        if not self.random_start:
+            return np.full(n, self.window)
+
+        # Leave room for a full episode when a length is given
+        high = self.last_t - (self.episode_length or 1)
+        high = max(high, self.window)
+        return self._rng.integers(self.window, high + 1, size=n)
+
+    def _observe(self, t):
+        return self._obs[t - self.window]
+
+    def _reset_envs(self, mask):
+        n = int(mask.sum())
+        self.t[mask] = self._start_offsets(n)
+        self.steps[mask] = 0
+        self.nav[mask] = 1.0
+        self.max_nav[mask] = 1.0
+        self.prev_weights[mask] = 1.0 / self.n_assets
+
+    # -----------------------------
+    # VecEnv API
+    # -----------------------------
+    def reset(self):
+        # VecEnv.seed() only stores seeds; like DummyVecEnv they apply at
+        # the next reset, once. All envs share one RNG, seeded by env 0's.
+        if self._seeds[0] is not None:
+            self._rng = np.random.default_rng(self._seeds[0])
+        self._reset_seeds()
+        self._reset_options()  # episodes take no reset options
+
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self._observe(self.t)
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions, dtype=np.float64).reshape(
+            self.num_envs, self.n_assets
+        )
+
+    def step_wait(self):
+        action = np.clip(self._actions, 0, 1)
+        weights = action / (action.sum(axis=1, keepdims=True) + 1e-8)
+
+        port_ret = np.einsum("ij,ij->i", self.returns[self.t], weights)
+        self.nav *= 1 + port_ret
+        np.maximum(self.max_nav, self.nav, out=self.max_nav)
+
+        drawdown = (self.max_nav - self.nav) / self.max_nav
+        turnover = np.sum((weights - self.prev_weights) ** 2, axis=1)
+
+        k = self.t - self.window
+        mean_ret = np.einsum("ij,ij->i", self._mean[k], weights)
+        var = np.einsum("ij,ijk,ik->i", weights, self._cov[k], weights)
+        sharpe_t = mean_ret / (np.sqrt(np.maximum(var, 0.0)) + 1e-8)
+
+        rewards = (
+            sharpe_t
+            - self.lambda_dd * drawdown
+            - self.lambda_tc * turnover
+        ).astype(np.float32)
+
+        self.prev_weights = weights
+        self.t += 1
+        self.steps += 1
+
+        terminated = self.t >= self.last_t
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        if self.episode_length is not None:
+            truncated = (self.steps >= self.episode_length) & ~terminated
+        dones = terminated | truncated
+
+        obs = self._observe(self.t)
+        infos = [{} for _ in range(self.num_envs)]
+
+        if dones.any():
+            for i in np.flatnonzero(dones):
+                infos[i] = {
+                    "terminal_observation": obs[i].copy(),
+                    "TimeLimit.truncated": bool(truncated[i]),
+                    "episode_nav": float(self.nav[i]),
+                }
+            self._reset_envs(dones)
+            obs[dones] = self._observe(self.t[dones])
+
+        return obs, rewards, dones, infos
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name)] * len(self._get_indices(indices))
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        # No per-env sub-environments: every index calls the vectorised env
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False] * len(self._get_indices(indices))
@@ -1,42 +1,252 @@
-import yfinance as yf
-import numpy as np
+import argparse
+import glob
+import os
+import time
+
+import torch
 from stable_baselines3 import PPO
+from stable_baselines3.common.callbacks import BaseCallback, CheckpointCallback
+from stable_baselines3.common.vec_env import SubprocVecEnv
+
 from rl.env_portfolio import PortfolioEnv
+from rl.vec_env_portfolio import PortfolioVecEnv
+from utils.data import fetch_prices
+from utils.features import as_feature_array, feature_dim
+from utils.model_registry import MODEL_REGISTRY_PATH, get_registry
+from utils.shared_arrays import SharedEnvData
 
 # -----------------------------
 # FIXED ASSET UNIVERSE
 # -----------------------------
 TICKERS = ["AAPL", "MSFT", "GOOGL", "NVDA"]
 WINDOW = 20
+N_ENVS = 64
+ROLLOUT_SIZE = 2048  # transitions per PPO update, across all envs
+TOTAL_TIMESTEPS = 300_000
+CHECKPOINT_EVERY = 50_000  # timesteps
+CHECKPOINT_DIR = "checkpoints"
+CHECKPOINT_PREFIX = "ppo_portfolio"
+
+_THREAD_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
 
-prices = yf.download(TICKERS, period="5y")["Close"]
-returns = prices.pct_change().dropna().values
 
 # -----------------------------
-# ENVIRONMENT
+# THROUGHPUT REPORTING
+# Rollout collection and the PPO update alternate, so timing each phase
+# from the rollout boundaries splits wall time between the two.
 # -----------------------------
-env = PortfolioEnv(
-    returns=returns,
-    window=WINDOW,
-    lambda_dd=0.05,
-    lambda_tc=0.002
-)
+class ThroughputCallback(BaseCallback):
+    def __init__(self, verbose=0):
+        super().__init__(verbose)
+        self._rollout_start = None
+        self._rollout_end = None
+        self._start_steps = 0
+
+    def _on_rollout_start(self):
+        now = time.perf_counter()
+        if self._rollout_end is not None:
+            # The update for the previous rollout just finished
+            self.logger.record("perf/update_time_s", now - self._rollout_end)
+        self._rollout_start = now
+        self._start_steps = self.num_timesteps
+
+    def _on_step(self):
+        return True
+
+    def _on_rollout_end(self):
+        self._rollout_end = time.perf_counter()
+        elapsed = self._rollout_end - self._rollout_start
+        steps = self.num_timesteps - self._start_steps
+        self.logger.record("perf/env_steps_per_sec", steps / max(elapsed, 1e-9))
+        self.logger.record("perf/rollout_time_s", elapsed)
+
 
 # -----------------------------
-# PPO MODEL (STABLE & STRONG)
+# ENVIRONMENTS
 # -----------------------------
-model = PPO(
-    "MlpPolicy",
-    env,
-    learning_rate=3e-4,
-    n_steps=2048,
-    batch_size=64,
-    gamma=0.99,
-    ent_coef=0.01,
-    verbose=1
-)
-
-model.learn(total_timesteps=300_000)
-model.save("ppo_portfolio_agent")
-
-print("✅ PPO agent trained and saved.")
+def _pin_threads(n_threads):
+    for var in _THREAD_VARS:
+        os.environ[var] = str(n_threads)
+    torch.set_num_threads(n_threads)
+
+
+def _make_worker_env(data, window, features):
+    def init():
+        # Each worker process steps its own env on one core, attached to
+        # the parent's shared returns and rolling arrays
+        _pin_threads(1)
+        return PortfolioEnv(data, window=window, features=features)
+    return init
+
+
+def make_env(returns, args):
+    # Returns (env, shared data to unlink after training, or None)
+    if args.vec_env == "subproc":
+        data = SharedEnvData(returns, args.window, features=args.features)
+        print(f"Sharing {data.nbytes / 2**20:.1f} MiB of env data across {args.n_envs} workers")
+
+        # Worker processes inherit the thread limits at spawn time
+        saved = {var: os.environ.get(var) for var in _THREAD_VARS}
+        for var in _THREAD_VARS:
+            os.environ[var] = "1"
+        try:
+            env = SubprocVecEnv(
+                [_make_worker_env(data, args.window, args.features) for _ in range(args.n_envs)],
+                start_method="spawn"
+            )
+        except Exception:
+            data.unlink()
+            raise
+        finally:
+            for var, value in saved.items():
+                if value is None:
+                    os.environ.pop(var, None)
+                else:
+                    os.environ[var] = value
+        return env, data
+
+    env = PortfolioVecEnv(
+        returns=returns,
+        num_envs=args.n_envs,
+        window=args.window,
+        lambda_dd=0.05,
+        lambda_tc=0.002,
+        random_start=True,
+        seed=args.seed,
+        features=args.features
+    )
+    return env, None
+
+
+def latest_checkpoint(checkpoint_dir=CHECKPOINT_DIR):
+    paths = glob.glob(os.path.join(checkpoint_dir, f"{CHECKPOINT_PREFIX}_*_steps.zip"))
+    if not paths:
+        return None
+    return max(paths, key=lambda p: int(p.rsplit("_", 2)[-2]))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the PPO portfolio agent")
+    parser.add_argument("--tickers", nargs="+", default=TICKERS)
+    parser.add_argument("--period", default="5y")
+    parser.add_argument("--window", type=int, default=WINDOW)
+    parser.add_argument("--features", default=None, help=".npy feature array aligned with the returns")
+    parser.add_argument("--timesteps", type=int, default=TOTAL_TIMESTEPS)
+    parser.add_argument("--n-envs", type=int, default=N_ENVS)
+    parser.add_argument(
+        "--vec-env",
+        choices=["vector", "subproc"],
+        default="vector",
+        help="vector: all envs as array ops in-process; subproc: one process per env"
+    )
+    parser.add_argument("--rollout-size", type=int, default=ROLLOUT_SIZE)
+    parser.add_argument("--threads", type=int, default=None, help="torch threads for the learner")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY)
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR)
+    parser.add_argument("--resume", default=None, help="checkpoint .zip, or 'latest'")
+    parser.add_argument("--output", default="ppo_portfolio_agent")
+    parser.add_argument("--name", default=None, help="registry name, defaults to the output file name")
+    parser.add_argument(
+        "--registry", nargs="?", const=str(MODEL_REGISTRY_PATH), default=None,
+        help=f"register the agent in this model registry manifest ({MODEL_REGISTRY_PATH} if no path); "
+             "not registered without it"
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def train(env, args):
+    resume = latest_checkpoint(args.checkpoint_dir) if args.resume == "latest" else args.resume
+
+    # -----------------------------
+    # PPO MODEL (STABLE & STRONG)
+    # -----------------------------
+    if resume:
+        model = PPO.load(resume, env=env)
+        print(f"Resuming from {resume} at {model.num_timesteps} timesteps")
+    else:
+        model = PPO(
+            "MlpPolicy",
+            env,
+            learning_rate=3e-4,
+            n_steps=max(args.rollout_size // args.n_envs, 1),
+            batch_size=64,
+            gamma=0.99,
+            ent_coef=0.01,
+            seed=args.seed,
+            verbose=1
+        )
+
+    callbacks = [
+        ThroughputCallback(),
+        CheckpointCallback(
+            save_freq=max(args.checkpoint_every // args.n_envs, 1),
+            save_path=args.checkpoint_dir,
+            name_prefix=CHECKPOINT_PREFIX
+        )
+    ]
+
+    remaining = args.timesteps - model.num_timesteps
+    start = time.perf_counter()
+    start_steps = model.num_timesteps
+
+    if remaining > 0:
+        model.learn(
+            total_timesteps=remaining,
+            callback=callbacks,
+            reset_num_timesteps=not resume
+        )
+
+    model.save(args.output)
+    return model, model.num_timesteps - start_steps, time.perf_counter() - start
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    cores = os.cpu_count() or 1
+    if args.threads is None:
+        # Leave the cores running subprocess workers to them
+        busy = args.n_envs if args.vec_env == "subproc" else 0
+        args.threads = max(1, cores - busy)
+
+    prices = fetch_prices(args.tickers, period=args.period)
+    returns = prices.pct_change().dropna().values
+
+    env, shared = make_env(returns, args)
+    _pin_threads(args.threads)
+
+    try:
+        model, steps, elapsed = train(env, args)
+    finally:
+        env.close()
+        if shared is not None:
+            shared.unlink()
+
+    print(
+        f"✅ PPO agent trained and saved to {args.output} "
+        f"({steps} steps in {elapsed:.1f}s, "
+        f"{args.n_envs} envs, {args.threads} learner threads)"
+    )
+
+    if args.registry is None:
+        return
+
+    # Columns of `returns` follow fetch_prices' (sorted) ticker order, which
+    # is the order the registry stores and the weights come out in
+    registry = get_registry(args.registry)
+    n_assets = len(prices.columns)
+    entry = registry.register(
+        args.name or os.path.basename(args.output.removesuffix(".zip")),
+        list(prices.columns),
+        os.path.relpath(os.path.abspath(args.output.removesuffix(".zip")), registry.path.parent.resolve()),
+        window=args.window,
+        # Feature channels per asset; 2-D (T, n_assets) files count as one
+        n_features=feature_dim(as_feature_array(args.features, len(returns), n_assets)) // n_assets,
+        timesteps=int(model.num_timesteps),
+        period=args.period,
+    )
+    print(f"Registered {entry.name} in {registry.path}")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
 import numpy as np
 import pandas as pd
 from utils.metrics import sharpe_ratio, max_drawdown
+from utils.cache import cached
+from utils.optimizer import solve_long_only_qp
+from utils.rl_inference import get_rl_weights_batch, PREDICT_CHUNK
+from utils.profiling import profiled
+from utils.rolling_stats import RollingWindowStats
 
+@profiled()
 def backtest_static(weights, returns):
     portfolio_returns = returns @ weights
     cumulative = (1 + portfolio_returns).cumprod()
@@ -12,37 +18,83 @@ def backtest_static(weights, returns):
         "Final Value": cumulative.iloc[-1]
     }
 
-def backtest_rl(agent, returns, window=20):
-    nav = 1.0
-    nav_series = []
-    prev_weights = None
+@profiled()
+def backtest_rl(agent, returns, window=20, chunk_size=PREDICT_CHUNK, features=None):
+    # All observations go through the policy as one (T, obs_dim) batch
+    # (chunked), instead of one agent.predict call per day.
+    weights = get_rl_weights_batch(
+        agent, returns, window=window, chunk_size=chunk_size, features=features
+    )[:-1]
 
-    for t in range(window, len(returns)):
-        window_returns = returns.iloc[t-window:t].values
+    port_ret = np.sum(np.asarray(returns)[window:] * weights, axis=1)
+    nav = np.cumprod(1 + port_ret)
 
-        vol = window_returns.std(axis=0)
-        corr = np.corrcoef(window_returns.T)
+    index = returns.index[window:] if isinstance(returns, pd.DataFrame) else None
+    columns = returns.columns if isinstance(returns, pd.DataFrame) else None
 
-        obs = np.concatenate([
-            window_returns.flatten(),
-            vol,
-            corr.flatten()
-        ])
+    nav_series = pd.Series(nav, index=index)
+    returns_series = nav_series.pct_change().dropna()
+
+    return {
+        "Sharpe": sharpe_ratio(returns_series),
+        "Max Drawdown": max_drawdown(nav_series),
+        "Final Value": nav_series.iloc[-1],
+        "Weights": pd.DataFrame(weights, index=index, columns=columns),
+        "NAV": nav_series
+    }
 
-        action, _ = agent.predict(obs, deterministic=True)
-        weights = action / np.sum(action)
 
-        port_ret = np.dot(returns.iloc[t], weights)
-        nav *= (1 + port_ret)
-        nav_series.append(nav)
+@profiled()
+@cached(max_entries=32)
+def backtest_walk_forward(
+    returns,
+    lookback=252,
+    rebalance_every=21,
+    expanding=False,
+    risk_aversion=0.0
+):
+    # Mean-variance re-fitted every `rebalance_every` days on the trailing
+    # `lookback` days (or everything so far if `expanding`), so each day
+    # trades on weights fitted strictly before it. Window moments are
+    # updated one bar at a time and every solve warm-starts from the
+    # previous weights.
+    values = np.asarray(returns, dtype=np.float64)
+    T, n = values.shape
 
-        prev_weights = weights
+    if T <= lookback:
+        raise ValueError(
+            f"Need more than {lookback} rows of returns, got {T}"
+        )
 
-    nav_series = pd.Series(nav_series)
-    returns_series = nav_series.pct_change().dropna()
+    stats = RollingWindowStats(n, window=T if expanding else lookback)
+    for row in values[:lookback]:
+        stats.push(row)
+
+    weights = np.empty((T - lookback, n))
+    w = None
+
+    for t in range(lookback, T):
+        if (t - lookback) % rebalance_every == 0:
+            w = solve_long_only_qp(
+                stats.cov() * 252,
+                lin=risk_aversion * stats.mean() * 252,
+                w0=w
+            )
+        weights[t - lookback] = w
+        stats.push(values[t])
+
+    index = returns.index[lookback:] if isinstance(returns, pd.DataFrame) else None
+    columns = returns.columns if isinstance(returns, pd.DataFrame) else None
+
+    portfolio_returns = pd.Series(
+        np.sum(values[lookback:] * weights, axis=1), index=index
+    )
+    cumulative = (1 + portfolio_returns).cumprod()
 
     return {
-        "Sharpe": sharpe_ratio(returns_series),
-        "Max Drawdown": max_drawdown(nav_series),
-        "Final Value": nav_series.iloc[-1]
+        "Sharpe": sharpe_ratio(portfolio_returns),
+        "Max Drawdown": max_drawdown(cumulative),
+        "Final Value": cumulative.iloc[-1],
+        "Weights": pd.DataFrame(weights, index=index, columns=columns),
+        "NAV": cumulative
     }
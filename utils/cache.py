@@ -0,0 +1,171 @@
+import functools
+import hashlib
+import inspect
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# PROCESS-WIDE RESULT CACHE
+# `cached` memoises an entry point for the whole server process, so every
+# page, rerun and user session shares one copy. Entries expire after `ttl`
+# seconds and the least recently used are evicted beyond `max_entries`.
+# DataFrame / array arguments are keyed by a hash of their content, and
+# concurrent callers asking for the same missing key wait for one
+# computation instead of each running it.
+# -----------------------------
+_CACHES = {}
+
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def content_key(value):
+    # Hashable, content-based stand-in for an argument
+    if isinstance(value, pd.DataFrame):
+        return (
+            "df",
+            value.shape,
+            tuple(map(str, value.columns)),
+            _digest(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+        )
+    if isinstance(value, pd.Series):
+        return ("series", str(value.name), _digest(pd.util.hash_pandas_object(value, index=True).values.tobytes()))
+    if isinstance(value, np.ndarray):
+        return ("array", value.shape, value.dtype.str, _digest(np.ascontiguousarray(value).tobytes()))
+    if isinstance(value, (list, tuple)):
+        return tuple(content_key(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, content_key(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value))
+    return value
+
+
+def _copy(value):
+    # Callers get their own copy of mutable results
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(_copy(v) for v in value)
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    return value
+
+
+class TTLCache:
+    def __init__(self, name, ttl=None, max_entries=128):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._data = OrderedDict()  # key -> (expires_at or None, value)
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> lock held while the value is computed
+
+        _CACHES[name] = self  # reported by cache_stats()
+
+    def _lookup(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] is not None and entry[0] <= now:
+            del self._data[key]
+            self.evictions += 1
+            return False, None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return True, entry[1]
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            found, value = self._lookup(key, time.monotonic())
+            if found:
+                return value
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                # Another caller may have filled it while we waited
+                found, value = self._lookup(key, time.monotonic())
+                if found:
+                    return value
+                self.misses += 1
+
+            try:
+                value = compute()
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+
+            with self._lock:
+                expires = None if self.ttl is None else time.monotonic() + self.ttl
+                self._data[key] = (expires, value)
+                self._data.move_to_end(key)
+                while len(self._data) > self.max_entries:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "cache": self.name,
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else None,
+                "evictions": self.evictions,
+            }
+
+
+def cached(ttl=None, max_entries=128, key=None, copy=True, name=None):
+    # `key`, if given, takes the function's arguments and returns the cache
+    # key (e.g. to normalise ticker order or add a file's mtime); by default
+    # every bound argument goes through content_key. With copy=True each
+    # caller receives its own copy of DataFrame / array results.
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        cache = TTLCache(name or f"{fn.__module__}.{fn.__qualname__}", ttl, max_entries)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if key is not None:
+                cache_key = content_key(key(*args, **kwargs))
+            else:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                cache_key = content_key(tuple(bound.arguments.items()))
+
+            value = cache.get_or_compute(cache_key, lambda: fn(*args, **kwargs))
+            return _copy(value) if copy else value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def cache_stats():
+    return [cache.stats() for cache in _CACHES.values()]
+
+
+def clear_caches():
+    for cache in _CACHES.values():
+        cache.clear()
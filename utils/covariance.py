@@ -0,0 +1,103 @@
+import numpy as np
+
+from utils.profiling import profiled
+
+COV_METHODS = ("sample", "ledoit_wolf", "factor")
+N_FACTORS = 5
+MIN_IDIO_VAR = 1e-12
+
+
+class FactorCovariance:
+    # Σ = B Bᵀ + diag(d) with loadings B (n x k) and idiosyncratic
+    # variances d (n). Stored and applied in O(n·k); the dense n x n matrix
+    # is only built on request.
+
+    def __init__(self, loadings, idio):
+        self.loadings = np.asarray(loadings, dtype=np.float64)
+        self.idio = np.asarray(idio, dtype=np.float64)
+
+    @property
+    def n_assets(self):
+        return self.loadings.shape[0]
+
+    @property
+    def n_factors(self):
+        return self.loadings.shape[1]
+
+    def __mul__(self, c):
+        return FactorCovariance(self.loadings * np.sqrt(c), self.idio * c)
+
+    __rmul__ = __mul__
+
+    def diag(self):
+        return np.sum(self.loadings ** 2, axis=1) + self.idio
+
+    def dot(self, w):
+        # Σ w for a vector, or W Σ for a stack of row vectors
+        return (w @ self.loadings) @ self.loadings.T + w * self.idio
+
+    def quad(self, w):
+        # wᵀ Σ w, row-wise for a stack of weights
+        return np.sum((w @ self.loadings) ** 2, axis=-1) + np.sum(w * w * self.idio, axis=-1)
+
+    def column(self, j):
+        col = self.loadings @ self.loadings[j]
+        col[j] += self.idio[j]
+        return col
+
+    def solve(self, idx, rhs, ridge=0.0):
+        # (Σ_FF + ridge I)⁻¹ rhs by Woodbury, O(|F| k^2 + k^3)
+        b = self.loadings[idx]
+        d_inv = 1 / (self.idio[idx] + ridge)
+        rhs = np.asarray(rhs, dtype=np.float64)
+        scaled = d_inv[:, None] * rhs if rhs.ndim == 2 else d_inv * rhs
+
+        inner = np.eye(self.n_factors) + b.T @ (d_inv[:, None] * b)
+        correction = b @ np.linalg.solve(inner, b.T @ scaled)
+        if rhs.ndim == 2:
+            return scaled - d_inv[:, None] * correction
+        return scaled - d_inv * correction
+
+    def sample(self, rng, shape, dtype=np.float64):
+        # Zero-mean draws with covariance Σ, shape (*shape, n)
+        z_f = rng.standard_normal((*shape, self.n_factors), dtype=dtype)
+        z_e = rng.standard_normal((*shape, self.n_assets), dtype=dtype)
+        return z_f @ self.loadings.T.astype(dtype) + z_e * np.sqrt(self.idio).astype(dtype)
+
+    def dense(self):
+        return self.loadings @ self.loadings.T + np.diag(self.idio)
+
+
+def factor_covariance(returns, n_factors=N_FACTORS):
+    # PCA factor model: top-k principal components of the sample covariance
+    # as loadings, with the residual diagonal as idiosyncratic variance
+    x = np.asarray(returns, dtype=np.float64)
+    x = x - x.mean(axis=0)
+    T = len(x)
+
+    _, s, vt = np.linalg.svd(x, full_matrices=False)
+    k = min(n_factors, len(s))
+    loadings = vt[:k].T * (s[:k] / np.sqrt(T - 1))
+
+    sample_var = np.sum(x * x, axis=0) / (T - 1)
+    idio = np.maximum(sample_var - np.sum(loadings ** 2, axis=1), MIN_IDIO_VAR)
+
+    return FactorCovariance(loadings, idio)
+
+
+@profiled()
+def estimate_covariance(returns, method="sample", n_factors=N_FACTORS):
+    # Daily covariance of `returns` (T x n); dense array for "sample" and
+    # "ledoit_wolf", FactorCovariance for "factor"
+    if method == "sample":
+        return np.cov(np.asarray(returns, dtype=np.float64), rowvar=False)
+    if method == "ledoit_wolf":
+        from sklearn.covariance import ledoit_wolf  # ~2 s import, only needed here
+
+        x = np.asarray(returns, dtype=np.float64)
+        # Rescale to the sample (ddof=1) convention used elsewhere
+        return ledoit_wolf(x)[0] * len(x) / (len(x) - 1)
+    if method == "factor":
+        return factor_covariance(returns, n_factors)
+
+    raise ValueError(f"Unknown covariance method: {method} (expected one of {COV_METHODS})")
@@ -1,6 +1,14 @@
-import yfinance as yf
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
 import pandas as pd
 
+from utils.cache import cached
+from utils.profiling import profiled
+
 
 ASSET_CATEGORIES = {
     "US Tech Stocks": ["AAPL", "MSFT", "GOOGL", "NVDA", "META"],
@@ -10,7 +18,192 @@ ASSET_CATEGORIES = {
     "Crypto Proxies": ["COIN", "MSTR"],
 }
 
+# -----------------------------
+# LOCAL PRICE STORE
+# One Parquet file per ticker + a small JSON index recording which date
+# range has already been requested from Yahoo and when it was last checked.
+# -----------------------------
+PRICE_STORE_DIR = Path(os.getenv("PRICE_STORE_DIR", ".price_store"))
+PRICE_STORE_OFFLINE = os.getenv("PRICE_STORE_OFFLINE", "0") == "1"
+PRICE_CACHE_TTL = float(os.getenv("PRICE_CACHE_TTL", 900))  # seconds in the in-process cache
+
+_INDEX_FILE = "_index.json"
+_PERIOD_UNITS = {"d": "days", "mo": "months", "y": "years"}
+
+# Concurrent updates (overlapping ticker sets have different cache keys)
+# write through unique temp files and merge their index entries under
+# this lock, so none of them is lost
+_index_lock = threading.Lock()
+
+
+def _period_start(period, today):
+    if period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=today.year, month=1, day=1)
+
+    for suffix, unit in _PERIOD_UNITS.items():
+        if period.endswith(suffix) and period[: -len(suffix)].isdigit():
+            return today - pd.DateOffset(**{unit: int(period[: -len(suffix)])})
+
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def _load_index(store_dir):
+    path = store_dir / _INDEX_FILE
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def _replace_atomically(path, write):
+    # write(tmp_path), then rename over `path`; the temp name is unique
+    # per call so concurrent writers never share one
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False) as f:
+        tmp = f.name
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _update_index(store_dir, entries):
+    with _index_lock:
+        index = _load_index(store_dir)
+        index.update(entries)
+        _replace_atomically(
+            store_dir / _INDEX_FILE,
+            lambda tmp: Path(tmp).write_text(json.dumps(index, indent=2, sort_keys=True))
+        )
+
+
+def load_stored_prices(ticker, store_dir=None):
+    path = Path(store_dir or PRICE_STORE_DIR) / f"{ticker}.parquet"
+    if not path.exists():
+        return None
+    return pd.read_parquet(path)["Close"].rename(ticker)
+
+
+def _write_stored_prices(series, store_dir):
+    _replace_atomically(
+        store_dir / f"{series.name}.parquet",
+        lambda tmp: series.to_frame("Close").to_parquet(tmp)
+    )
+
+
+def _download(tickers, start=None, period=None):
+    # Only reached on a price-store miss, so yfinance is imported here
+    import yfinance as yf
+
+    if start is not None:
+        data = yf.download(tickers, start=start, progress=False)["Close"]
+    else:
+        data = yf.download(tickers, period=period, progress=False)["Close"]
+
+    if isinstance(data, pd.Series):
+        data = data.to_frame(tickers[0])
+
+    data.index = pd.DatetimeIndex(data.index).tz_localize(None).normalize()
+    return data
+
+
+@profiled()
+def update_price_store(tickers, period="1y", store_dir=None):
+    store_dir = Path(store_dir or PRICE_STORE_DIR)
+    store_dir.mkdir(parents=True, exist_ok=True)
+
+    today = pd.Timestamp.today().normalize()
+    start = _period_start(period, today)
+    index = _load_index(store_dir)
+
+    # Group tickers by the date they need downloading from, so each group
+    # is a single multi-ticker HTTP call.
+    backfill, topups = [], {}
+    for ticker in tickers:
+        meta = index.get(ticker)
+        stored = load_stored_prices(ticker, store_dir)
+
+        if meta is None or stored is None or stored.empty:
+            backfill.append(ticker)
+        elif meta["start"] is not None and (
+            start is None or start < pd.Timestamp(meta["start"])
+        ):
+            backfill.append(ticker)
+        elif pd.Timestamp(meta["checked"]) < today:
+            # Re-request the last stored bar too, in case it was intraday.
+            since = stored.index[-1]
+            topups.setdefault(since, []).append(ticker)
+
+    jobs = [(backfill, None)] if backfill else []
+    jobs += [(group, since) for since, group in topups.items()]
+
+    updates = {}
+    for group, since in jobs:
+        if since is None:
+            fresh = _download(group, period=period)
+        else:
+            fresh = _download(group, start=since)
+
+        for ticker in group:
+            new = fresh[ticker].dropna() if ticker in fresh else pd.Series(dtype=float)
+            stored = load_stored_prices(ticker, store_dir)
+
+            if stored is not None and not new.empty:
+                merged = pd.concat([stored, new])
+                merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            elif stored is not None:
+                merged = stored
+            else:
+                merged = new
+
+            _write_stored_prices(merged.rename(ticker), store_dir)
+
+            prev_start = index.get(ticker, {}).get("start")
+            if since is None:
+                covered = None if start is None else start.strftime("%Y-%m-%d")
+            else:
+                covered = prev_start
+
+            updates[ticker] = {
+                "start": covered,
+                "checked": today.strftime("%Y-%m-%d"),
+            }
+
+    if updates:
+        _update_index(store_dir, updates)
+
+
+def _prices_key(tickers, period="1y", offline=None, store_dir=None):
+    tickers = sorted(set([tickers] if isinstance(tickers, str) else tickers))
+    return tickers, period, offline, str(store_dir or PRICE_STORE_DIR)
+
+
+@profiled()
+@cached(ttl=PRICE_CACHE_TTL, max_entries=64, key=_prices_key)
+def fetch_prices(tickers, period="1y", offline=None, store_dir=None):
+    tickers = sorted(set([tickers] if isinstance(tickers, str) else tickers))
+    offline = PRICE_STORE_OFFLINE if offline is None else offline
+    store_dir = Path(store_dir or PRICE_STORE_DIR)
+
+    if not offline:
+        update_price_store(tickers, period=period, store_dir=store_dir)
+
+    series = []
+    for ticker in tickers:
+        stored = load_stored_prices(ticker, store_dir)
+        if stored is None:
+            raise FileNotFoundError(
+                f"No stored prices for {ticker} in {store_dir}"
+            )
+        series.append(stored)
+
+    data = pd.concat(series, axis=1) if series else pd.DataFrame()
+
+    start = _period_start(period, pd.Timestamp.today().normalize())
+    if start is not None:
+        data = data[data.index >= start]
 
-def fetch_prices(tickers, period="1y"):
-    data = yf.download(tickers, period=period)["Close"]
     return data.dropna()
@@ -0,0 +1,76 @@
+import pandas as pd
+import streamlit as st
+
+from utils import profiling
+from utils.cache import cache_stats, clear_caches
+
+# -----------------------------
+# DIAGNOSTICS PANEL
+# Collapsible per-page view of utils.profiling: the stages of this page
+# run, process-wide totals, the shared result caches' hit/miss counters,
+# and controls to toggle profiling or append everything to the profile log.
+# The toggle is per browser session: pages call start_run() from here,
+# which only records this session's runs. Peak memory tracking is a
+# process-wide setting (PROFILE_MEMORY=1) and cannot be switched from the UI.
+# -----------------------------
+_SESSION_KEY = "profile_stages"
+
+
+def start_run():
+    profiling.start_run(enabled=st.session_state.get(_SESSION_KEY, False))
+
+
+def _format(rows, columns):
+    df = pd.DataFrame(rows, columns=columns)
+    if "peak_bytes" in df:
+        df["peak_MiB"] = df.pop("peak_bytes") / 2**20
+    return df
+
+
+def diagnostics_panel(page):
+    with st.expander("⏱️ Diagnostics"):
+        session = st.session_state.get(_SESSION_KEY, False)
+        enabled = st.checkbox(
+            "Profile stages (this session)",
+            value=session,
+            key=f"{page}_profiling"
+        )
+        if enabled != session:
+            st.session_state[_SESSION_KEY] = enabled
+            st.caption("Profiling setting changed; it applies from the next run.")
+        if profiling.memory_enabled():
+            st.caption("Peak memory tracking is on for this process (PROFILE_MEMORY=1).")
+
+        caches = cache_stats()
+        if caches:
+            st.markdown("**Result caches**")
+            st.dataframe(pd.DataFrame(caches), use_container_width=True, hide_index=True)
+            if st.button("Clear caches", key=f"{page}_clear_caches"):
+                clear_caches()
+
+        if not profiling.is_enabled():
+            st.caption("Profiling is off for this run (set PROFILING=1 or tick the box above).")
+            return
+
+        events = profiling.run_events()
+        if events:
+            st.markdown("**This run**")
+            run_df = _format(events, ["stage", "depth", "start_s", "seconds", "peak_bytes"])
+            run_df["stage"] = ["  " * d + s for d, s in zip(run_df.pop("depth"), run_df["stage"])]
+            st.dataframe(run_df, use_container_width=True, hide_index=True)
+
+        totals = profiling.stats()
+        if totals:
+            st.markdown("**Since startup**")
+            st.dataframe(
+                _format(totals, ["stage", "calls", "total_s", "mean_s", "min_s", "max_s", "peak_bytes"]),
+                use_container_width=True,
+                hide_index=True
+            )
+
+        col1, col2 = st.columns(2)
+        if col1.button("Dump to log", key=f"{page}_profile_dump"):
+            path = profiling.dump_stats(label=page)
+            st.success(f"Appended to {path}")
+        if col2.button("Reset totals", key=f"{page}_profile_reset"):
+            profiling.reset_stats()
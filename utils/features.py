@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.shared_arrays import open_array
+
+# -----------------------------
+# EXTRA OBSERVATION FEATURES
+# Per-asset, per-day arrays of shape (T, n_assets, n_channels) aligned
+# row-for-row with the returns (e.g. a sentiment index or volume). They are
+# kept on disk as .npy and memory-mapped. A backtest reads only the rows
+# it observes; an environment reads each row once, when it builds its
+# observations (feature_observations), and never copies them per step.
+#
+# Row t holds what is known at the close of day t, like returns[t]. The
+# decision at t (made from returns[t - window : t]) therefore sees
+# features[t - 1], flattened and appended after the rolling statistics.
+# -----------------------------
+
+
+def save_features(path, features):
+    features = np.asarray(features, dtype=np.float32)
+    tmp = f"{path}.tmp.npy"
+    np.save(tmp, features)
+    os.replace(tmp, path)
+
+
+def load_features(path):
+    return np.load(path, mmap_mode="r")
+
+
+def as_feature_array(features, n_rows, n_assets):
+    # Path, SharedArray or array -> (T, n_assets, n_channels) view, without reading it
+    if features is None:
+        return None
+    features = open_array(features)
+    if features.ndim == 2:
+        features = features[:, :, None]
+
+    if features.shape[:2] != (n_rows, n_assets):
+        raise ValueError(
+            f"Features of shape {features.shape} are not aligned with "
+            f"{n_rows} rows x {n_assets} assets of returns"
+        )
+    return features
+
+
+def feature_dim(features):
+    return 0 if features is None else features.shape[1] * features.shape[2]
+
+
+def with_features(base_obs, features, t, window):
+    # Observations for decision index t (int or array), as built for
+    # PortfolioEnv: base_obs[t - window] followed by features[t - 1]
+    obs = base_obs[t - window]
+    if features is None:
+        return obs
+
+    extra = np.asarray(features[np.asarray(t) - 1], dtype=np.float32)
+    return np.concatenate([obs, extra.reshape(*obs.shape[:-1], -1)], axis=-1)
+
+
+def feature_observations(base_obs, features, window):
+    # with_features for every decision index at once, written into one
+    # preallocated array, so env steps only index into it
+    if features is None:
+        return base_obs
+
+    n, base_dim = base_obs.shape
+    obs = np.empty((n, base_dim + feature_dim(features)), dtype=np.float32)
+    obs[:, :base_dim] = base_obs
+    obs[:, base_dim:] = np.asarray(features[window - 1 : window - 1 + n], dtype=np.float32).reshape(n, -1)
+    return obs
+
+
+def sentiment_features(sentiment_index, dates, tickers, columns=("ewm",)):
+    # (T, n_assets, n_channels) array from a utils.sentiment_index frame,
+    # aligned to `dates`; days without news carry the last value forward
+    # and tickers never mentioned are 0 (neutral)
+    dates = pd.DatetimeIndex(dates).tz_localize(None).normalize()
+    channels = []
+
+    for column in columns:
+        table = sentiment_index.pivot_table(index="date", columns="ticker", values=column)
+        table.index = pd.DatetimeIndex(table.index).normalize()
+        table = table.reindex(columns=list(tickers))
+        table = table.reindex(table.index.union(dates)).ffill().reindex(dates)
+        channels.append(table.fillna(0.0).to_numpy(dtype=np.float32))
+
+    return np.stack(channels, axis=-1)
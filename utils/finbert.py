@@ -1,29 +1,114 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
+import os
+
 import numpy as np
 
-@torch.no_grad()
-def load_finbert():
-    tokenizer = AutoTokenizer.from_pretrained("yiyanghkust/finbert-tone")
-    model = AutoModelForSequenceClassification.from_pretrained("yiyanghkust/finbert-tone")
+from utils.profiling import profiled
+from utils.sentiment_cache import text_key
+
+MODEL_ID = "yiyanghkust/finbert-tone"
+LABELS = ["Negative", "Neutral", "Positive"]
+
+# -----------------------------
+# CPU INFERENCE SETTINGS
+# Texts are sorted by token length and scored in micro-batches capped both
+# in rows and in padded tokens, so one long headline no longer pads every
+# other row and peak memory is bounded regardless of how many texts come in.
+# -----------------------------
+MAX_BATCH_SIZE = 32
+MAX_BATCH_TOKENS = 4096
+INFERENCE_THREADS = int(os.getenv("FINBERT_THREADS", os.cpu_count() or 1))
+
+
+@profiled()
+def load_finbert(quantize=False, n_threads=None):
+    # torch / transformers take seconds to import, so pages that never
+    # score text do not pay for them
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    torch.set_num_threads(n_threads or INFERENCE_THREADS)
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_ID)
+    model = AutoModelForSequenceClassification.from_pretrained(MODEL_ID)
     model.eval()
+
+    if quantize:
+        # Dynamic int8 quantization of the Linear layers (CPU only)
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+    # Distinguishes fp32 and int8 results in the sentiment cache
+    model.cache_id = f"{MODEL_ID}:{'int8' if quantize else 'fp32'}"
+
     return tokenizer, model
 
-def predict_sentiment(texts, tokenizer, model):
-    inputs = tokenizer(
-        texts,
-        padding=True,
-        truncation=True,
-        return_tensors="pt"
-    )
+
+def _length_batches(lengths, batch_size, max_tokens):
+    # Indices sorted by length, cut into batches whose padded size
+    # (rows x longest row) stays within max_tokens
+    order = np.argsort(lengths, kind="stable")
+    batch = []
+    for i in order:
+        longest = lengths[i]  # sorted ascending, so the newest row is longest
+        if batch and (len(batch) >= batch_size or (len(batch) + 1) * longest > max_tokens):
+            yield batch
+            batch = []
+        batch.append(i)
+    if batch:
+        yield batch
+
+
+def _score(texts, tokenizer, model, batch_size, max_tokens):
+    import torch
+
+    probs = np.zeros((len(texts), len(LABELS)), dtype=np.float32)
+    if not texts:
+        return probs
+
+    encoded = tokenizer(list(texts), truncation=True)
+    lengths = np.array([len(ids) for ids in encoded["input_ids"]])
 
     with torch.no_grad():
-        outputs = model(**inputs)
-        probs = torch.softmax(outputs.logits, dim=1)
+        for batch in _length_batches(lengths, batch_size, max_tokens):
+            inputs = tokenizer.pad(
+                [{k: encoded[k][i] for k in encoded.keys()} for i in batch],
+                return_tensors="pt"
+            )
+            outputs = model(**inputs)
+            probs[batch] = torch.softmax(outputs.logits, dim=1).cpu().numpy()
+
+    return probs
+
+
+@profiled()
+def predict_sentiment(
+    texts,
+    tokenizer,
+    model,
+    batch_size=MAX_BATCH_SIZE,
+    max_tokens=MAX_BATCH_TOKENS,
+    cache=None
+):
+    texts = list(texts)
+
+    if cache is None:
+        probs = _score(texts, tokenizer, model, batch_size, max_tokens)
+    else:
+        # Only texts missing from the cache (deduplicated) go through the model
+        model_id = getattr(model, "cache_id", MODEL_ID)
+        keys = [text_key(t, model_id) for t in texts]
+        found = cache.get_many(keys)
+
+        missing = {k: t for k, t in zip(keys, texts) if k not in found}
+        if missing:
+            scored = _score(list(missing.values()), tokenizer, model, batch_size, max_tokens)
+            fresh = dict(zip(missing, scored))
+            cache.put_many(fresh, model_id)
+            found.update(fresh)
 
-    probs = probs.detach().cpu().numpy()
+        probs = np.array([found[k] for k in keys], dtype=np.float32).reshape(-1, len(LABELS))
 
-    labels = ["Negative", "Neutral", "Positive"]
-    sentiments = [labels[np.argmax(p)] for p in probs]
+    sentiments = [LABELS[np.argmax(p)] for p in probs]
 
     return sentiments, probs
@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import pkgutil
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+# -----------------------------
+# STARTUP IMPORT REPORT
+# Imports each module in a fresh interpreter with `python -X importtime`
+# and reports its cold import time and the packages it pulled in, heaviest
+# first. A new app worker pays these costs before serving its first page.
+#
+#   python -m utils.import_timing [utils.finbert utils.data ...]
+#       [--top 5] [--json out.json] [--budget 1.0]
+#
+# With --budget, modules whose cold import exceeds it (seconds) are
+# listed and the exit code is 1, so a heavy top-level import fails CI.
+# -----------------------------
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGES = ("utils", "rl")
+TOP = 5
+
+
+def default_modules():
+    modules = []
+    for package in PACKAGES:
+        for info in pkgutil.iter_modules([os.path.join(ROOT, package)]):
+            modules.append(f"{package}.{info.name}")
+    return sorted(modules)
+
+
+def _parse(stderr):
+    # "import time: self [us] | cumulative | imported package" rows
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    return rows
+
+
+def import_time(module, python=None, top=TOP):
+    python = python or sys.executable
+    start = time.perf_counter()
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+
+    rows = _parse(result.stderr)
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed"
+        return {"module": module, "error": error, "wall_s": wall}
+
+    # Self time summed per top-level package = what each dependency costs
+    packages = defaultdict(float)
+    for name, self_s, _ in rows:
+        packages[name.split(".")[0]] += self_s
+
+    own = [cumulative for name, _, cumulative in rows if name == module]
+    return {
+        "module": module,
+        "import_s": own[-1] if own else 0.0,
+        "wall_s": wall,  # includes interpreter startup
+        "modules_loaded": len(rows),
+        "heaviest": sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top],
+    }
+
+
+def report(modules=None, python=None, top=TOP):
+    return [import_time(module, python, top) for module in modules or default_modules()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold import time per module")
+    parser.add_argument("modules", nargs="*", help="defaults to every utils / rl module")
+    parser.add_argument("--top", type=int, default=TOP, help="heaviest packages listed per module")
+    parser.add_argument("--json", default=None, help="also write the report here")
+    parser.add_argument("--budget", type=float, default=None, help="seconds; exit 1 if a module exceeds it")
+    args = parser.parse_args()
+
+    results = report(args.modules, top=args.top)
+    results.sort(key=lambda r: r.get("import_s", -1), reverse=True)
+
+    print(f"{'module':<28} {'import ms':>10} {'wall ms':>9} {'modules':>8}  heaviest packages")
+    for r in results:
+        if "error" in r:
+            print(f"{r['module']:<28} {'':>10} {r['wall_s'] * 1e3:9.0f} {'':>8}  error: {r['error']}")
+            continue
+        heaviest = ", ".join(f"{name} {seconds * 1e3:.0f}" for name, seconds in r["heaviest"])
+        print(
+            f"{r['module']:<28} {r['import_s'] * 1e3:10.0f} {r['wall_s'] * 1e3:9.0f}"
+            f" {r['modules_loaded']:8d}  {heaviest}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.budget is not None:
+        over = [r["module"] for r in results if r.get("import_s", 0) > args.budget]
+        if over:
+            print(f"\n{len(over)} module(s) over the {args.budget:.2f} s budget: {', '.join(over)}")
+            sys.exit(1)
@@ -0,0 +1,442 @@
+import argparse
+import http.client
+import io
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+import warnings
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import numpy as np
+
+from utils.rl_inference import policy_dims
+
+# -----------------------------
+# MICRO-BATCHING POLICY SERVER
+# One long-lived process keeps the policy warm and serves it to many
+# callers. Concurrent predict() calls are queued and a single worker
+# thread stacks them into one forward pass: it waits at most
+# `max_wait_ms` after the first queued request, or until `max_batch`
+# observation rows are collected, then returns each caller its own rows.
+#
+#   python -m utils.inference_server [--agent ppo_portfolio_agent]
+#       [--port 8765 | --socket /tmp/rl.sock] [--max-batch 256] [--max-wait-ms 5]
+#
+#   POST /predict   observations (n x obs_dim) -> actions (n x n_assets);
+#                   body is an .npy array (application/x-npy) or JSON
+#                   {"observations": [[...], ...]}
+#   GET  /stats     throughput, batch sizes and latency percentiles
+#   GET  /health
+#
+# /health names the served model and its observation / action sizes. Set
+# RL_INFERENCE_URL (http://host:port or unix:///path/to.sock) and
+# load_rl_agent / ModelRegistry.load return an InferenceClient, a drop-in
+# agent that forwards predict() to the server, for the model it serves;
+# other models, or an unreachable server, load locally. If the server
+# goes away later the client predicts with the local policy instead.
+# -----------------------------
+DEFAULT_PORT = 8765
+MAX_BATCH = 256  # observation rows per forward pass
+MAX_WAIT_MS = 5.0  # latency budget spent waiting for more requests
+LATENCY_SAMPLES = 10000
+TIMEOUT = 30
+RETRY_REMOTE_S = 30  # after a failed request, predict locally this long before retrying the server
+LISTEN_BACKLOG = 128  # pending connections; the socketserver default of 5 resets bursts
+
+NPY_TYPE = "application/x-npy"
+
+
+def _to_npy(array):
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(array), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def _from_npy(data):
+    return np.load(io.BytesIO(data), allow_pickle=False)
+
+
+class MicroBatcher:
+    def __init__(self, agent, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.agent = agent
+        self.max_batch = max_batch
+        # Known for local policies; requests of another width are rejected
+        # in submit() so they cannot fail the batch they would join
+        dims = policy_dims(agent)
+        self.obs_dim, self.n_assets = dims if dims else (None, None)
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue = deque()  # (observations, future, enqueued_at)
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._started = time.monotonic()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+
+        self._worker = threading.Thread(target=self._run, name="rl-micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, observations):
+        obs = np.asarray(observations, dtype=np.float32)
+        obs = obs.reshape(1, -1) if obs.ndim == 1 else obs
+        if obs.ndim != 2 or (self.obs_dim is not None and obs.shape[1] != self.obs_dim):
+            raise ValueError(
+                f"Expected observations of shape (n, {self.obs_dim or 'obs_dim'}), got {obs.shape}"
+            )
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.append((obs, future, time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=True):
+        # Same contract as the agent's predict, so it can stand in for one
+        if not deterministic:
+            raise ValueError("The inference server only serves deterministic actions")
+        single = np.ndim(observation) == 1
+        actions = self.submit(observation).result()
+        return (actions[0] if single else actions), None
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return None
+
+            # Wait out the latency budget of the oldest request for company
+            deadline = self._queue[0][2] + self.max_wait
+            while not self._closed:
+                rows = sum(len(obs) for obs, _, _ in self._queue)
+                remaining = deadline - time.perf_counter()
+                if rows >= self.max_batch or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            # Only requests as wide as the oldest one share its batch; the
+            # rest keep their place in the queue
+            width = self._queue[0][0].shape[1]
+            batch, rest, rows, full = [], deque(), 0, False
+            while self._queue:
+                item = self._queue.popleft()
+                if item[0].shape[1] == width and not full:
+                    full = bool(batch) and rows + len(item[0]) > self.max_batch
+                    if not full:
+                        batch.append(item)
+                        rows += len(item[0])
+                        continue
+                rest.append(item)
+            self._queue = rest
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            try:
+                obs = np.concatenate([item[0] for item in batch])
+                actions, _ = self.agent.predict(obs, deterministic=True)
+                actions = np.asarray(actions).reshape(len(obs), -1)
+            except Exception as e:
+                with self._stats_lock:
+                    self.errors += len(batch)
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            done = time.perf_counter()
+            offset = 0
+            for item_obs, future, _ in batch:
+                future.set_result(actions[offset : offset + len(item_obs)])
+                offset += len(item_obs)
+
+            with self._stats_lock:
+                self.batches += 1
+                self.requests += len(batch)
+                self.rows += len(obs)
+                self._latencies.extend(done - enqueued for _, _, enqueued in batch)
+
+    def stats(self):
+        with self._stats_lock:
+            latencies = np.array(self._latencies)
+            requests, rows, batches, errors = self.requests, self.rows, self.batches, self.errors
+        uptime = time.monotonic() - self._started
+
+        percentiles = {}
+        if len(latencies):
+            for p in (50, 90, 95, 99):
+                percentiles[f"p{p}_ms"] = float(np.percentile(latencies, p) * 1e3)
+            percentiles["max_ms"] = float(latencies.max() * 1e3)
+
+        return {
+            "uptime_s": uptime,
+            "requests": requests,
+            "rows": rows,
+            "batches": batches,
+            "errors": errors,
+            "queued": len(self._queue),
+            "mean_batch_rows": rows / batches if batches else None,
+            "requests_per_s": requests / uptime if uptime > 0 else None,
+            "rows_per_s": rows / uptime if uptime > 0 else None,
+            "latency": percentiles,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1e3,
+        }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join()
+
+
+# -----------------------------
+# HTTP / UNIX SOCKET FRONT END
+# -----------------------------
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive for the client's pooled connection
+
+    def _send(self, status, body, content_type="application/json"):
+        if content_type == "application/json":
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send(200, self.server.batcher.stats())
+        elif self.path == "/health":
+            batcher = self.server.batcher
+            self._send(200, {
+                "status": "ok",
+                "model": self.server.model_name,
+                "obs_dim": batcher.obs_dim,
+                "n_assets": batcher.n_assets,
+            })
+        else:
+            self._send(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        binary = self.headers.get("Content-Type") == NPY_TYPE
+        try:
+            obs = _from_npy(body) if binary else np.asarray(json.loads(body)["observations"])
+            actions = self.server.batcher.submit(obs).result()
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self._send(500, {"error": str(e)})
+            return
+
+        if binary:
+            self._send(200, _to_npy(actions), NPY_TYPE)
+        else:
+            self._send(200, {"actions": actions.tolist()})
+
+    def address_string(self):
+        # Unix socket peers have no (host, port)
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = LISTEN_BACKLOG
+
+
+class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    request_queue_size = LISTEN_BACKLOG
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+def make_server(batcher, host="127.0.0.1", port=DEFAULT_PORT, unix_socket=None, model_name=None):
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        server = _UnixHTTPServer(unix_socket, _Handler)
+    else:
+        server = _HTTPServer((host, port), _Handler)
+    server.batcher = batcher
+    server.model_name = model_name
+    return server
+
+
+# -----------------------------
+# CLIENT
+# -----------------------------
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=TIMEOUT):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        # Connect blocking: with a timeout set, a full backlog fails with EAGAIN
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+        self.sock.settimeout(self.timeout)
+
+
+class InferenceClient:
+    # Drop-in agent that forwards predict() to the inference server. Each
+    # thread (Streamlit session) keeps its own keep-alive connection.
+    # `fallback` loads the same policy locally; it is called the first time
+    # the server cannot be reached and predict() uses it until the server
+    # answers again.
+    def __init__(self, url, timeout=TIMEOUT, fallback=None):
+        self.url = url
+        self.timeout = timeout
+        self.model = self.obs_dim = self.n_assets = None  # filled in by health()
+        self._local = threading.local()
+        self._fallback = fallback
+        self._fallback_agent = None
+        self._fallback_lock = threading.Lock()
+        self._remote_after = 0.0  # monotonic time to try the server again
+
+        parsed = urlparse(url)
+        if parsed.scheme == "unix":
+            self._connect = lambda: _UnixConnection(parsed.path, timeout)
+        elif parsed.scheme == "http":
+            self._connect = lambda: http.client.HTTPConnection(
+                parsed.hostname, parsed.port or DEFAULT_PORT, timeout=timeout
+            )
+        else:
+            raise ValueError(f"Unsupported inference server URL {url!r}")
+
+    def _request(self, method, path, body=None, headers=None):
+        for attempt in range(2):
+            conn = getattr(self._local, "conn", None)
+            if conn is None:
+                conn = self._local.conn = self._connect()
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                data = response.read()
+            except (ConnectionError, http.client.HTTPException):
+                # Server closed an idle keep-alive connection; reconnect once
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+                continue
+
+            if response.status != 200:
+                raise RuntimeError(
+                    f"Inference server returned {response.status}: {data.decode(errors='replace')}"
+                )
+            return response, data
+
+    def _local_agent(self):
+        with self._fallback_lock:
+            if self._fallback_agent is None:
+                self._fallback_agent = self._fallback()
+            return self._fallback_agent
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=True):
+        if not deterministic:
+            raise ValueError("The inference server only serves deterministic actions")
+        if self._fallback is not None and time.monotonic() < self._remote_after:
+            return self._local_agent().predict(observation, deterministic=True)
+
+        obs = np.asarray(observation, dtype=np.float32)
+        single = obs.ndim == 1
+        try:
+            _, data = self._request(
+                "POST", "/predict", _to_npy(obs.reshape(1, -1) if single else obs),
+                {"Content-Type": NPY_TYPE}
+            )
+        except (OSError, http.client.HTTPException) as e:
+            if self._fallback is None:
+                raise
+            if not self._remote_after:
+                warnings.warn(f"RL inference server {self.url} unavailable ({e}); predicting locally")
+            self._remote_after = time.monotonic() + RETRY_REMOTE_S
+            return self._local_agent().predict(observation, deterministic=True)
+
+        self._remote_after = 0.0
+        actions = _from_npy(data)
+        return (actions[0] if single else actions), None
+
+    def stats(self):
+        return json.loads(self._request("GET", "/stats")[1])
+
+    def close(self):
+        # This thread's connection; other threads' close when collected
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def health(self):
+        info = json.loads(self._request("GET", "/health")[1])
+        # What the server serves, so policy_dims() / validate_policy() can
+        # check the client like a local policy
+        self.model = info.get("model")
+        self.obs_dim = info.get("obs_dim")
+        self.n_assets = info.get("n_assets")
+        return info
+
+
+if __name__ == "__main__":
+    from utils.rl_inference import agent_name, load_rl_agent
+
+    parser = argparse.ArgumentParser(description="Serve the RL policy with micro-batching")
+    parser.add_argument("--agent", default="ppo_portfolio_agent")
+    parser.add_argument("--model", default=None, help="registered model name (utils.model_registry) instead of --agent")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", default=None, help="serve on a Unix socket instead of TCP")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    if args.model:
+        from utils.model_registry import get_registry
+        agent = get_registry().load(args.model, local=True)
+        name = args.model
+    else:
+        agent = load_rl_agent(args.agent, local=True)
+        name = agent_name(args.agent)
+
+    batcher = MicroBatcher(agent, args.max_batch, args.max_wait_ms)
+    server = make_server(batcher, args.host, args.port, args.socket, model_name=name)
+    where = f"unix://{args.socket}" if args.socket else f"http://{args.host}:{args.port}"
+    print(f"Serving {name} ({type(agent).__name__}) on {where}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
@@ -0,0 +1,259 @@
+import argparse
+import json
+import os
+import threading
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+
+from utils.cache import TTLCache
+from utils.profiling import profiled
+from utils.rl_inference import (
+    OBS_VERSION,
+    WINDOW,
+    agent_files,
+    observation_dim,
+    policy_dims,
+    read_agent,
+    remote_agent,
+)
+
+# -----------------------------
+# MODEL REGISTRY
+# A JSON manifest maps each asset universe (ticker set + window +
+# observation version + extra feature channels) to a trained agent and
+# its metadata. Agents are loaded on first use and at most
+# `max_resident` stay in memory; the least recently used is dropped when
+# another one is needed. Every load checks the policy's observation and
+# action sizes against its entry.
+#
+#   python -m utils.model_registry list
+#   python -m utils.model_registry register NAME PATH --tickers AAPL MSFT ...
+#
+# Artifact paths are relative to the manifest's directory. Tickers are
+# stored sorted, the column order fetch_prices returns and the order the
+# agent's weights come out in.
+# -----------------------------
+MODEL_REGISTRY_PATH = Path(os.getenv("MODEL_REGISTRY_PATH", "model_registry.json"))
+MAX_RESIDENT = int(os.getenv("MAX_RESIDENT_AGENTS", 8))
+REGISTRY_VERSION = 1
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def _mtime(path):
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+def universe_key(tickers, window=WINDOW, obs_version=OBS_VERSION, n_features=0):
+    return tuple(sorted(set(tickers))), int(window), int(obs_version), int(n_features)
+
+
+class ModelEntry:
+    def __init__(self, name, tickers, path, window=WINDOW, obs_version=OBS_VERSION, n_features=0, metadata=None):
+        self.name = name
+        self.tickers = sorted(set(tickers))
+        self.path = str(path)
+        self.window = int(window)
+        self.obs_version = int(obs_version)
+        self.n_features = int(n_features)
+        self.metadata = metadata or {}
+
+    @property
+    def key(self):
+        return universe_key(self.tickers, self.window, self.obs_version, self.n_features)
+
+    @property
+    def n_assets(self):
+        return len(self.tickers)
+
+    @property
+    def obs_dim(self):
+        if self.obs_version != OBS_VERSION:
+            raise ValueError(
+                f"Model {self.name!r} uses observation version {self.obs_version}, "
+                f"this code builds version {OBS_VERSION}"
+            )
+        return observation_dim(self.n_assets, self.window, self.n_features)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "tickers": self.tickers,
+            "path": self.path,
+            "window": self.window,
+            "obs_version": self.obs_version,
+            "n_features": self.n_features,
+            "metadata": self.metadata,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def __repr__(self):
+        return f"ModelEntry({self.name!r}, {self.tickers}, window={self.window})"
+
+
+def validate_policy(agent, entry):
+    dims = policy_dims(agent)
+    if dims is not None and dims != (entry.obs_dim, entry.n_assets):
+        raise ValueError(
+            f"Model {entry.name!r} at {entry.path} takes {dims[0]} observations and "
+            f"returns {dims[1]} weights; its entry expects {entry.obs_dim} and {entry.n_assets} "
+            f"({entry.n_assets} assets, window {entry.window}, {entry.n_features} features)"
+        )
+
+
+class ModelRegistry:
+    def __init__(self, path=None, max_resident=MAX_RESIDENT):
+        self.path = Path(path or MODEL_REGISTRY_PATH)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._mtime = None
+        self._agents = TTLCache(f"model_registry:{self.path}", None, max_resident)
+
+    def _refresh(self):
+        # Re-read the manifest when another process (e.g. train_rl.py) changed it
+        with self._lock:
+            mtime = _mtime(self.path)
+            if mtime == self._mtime:
+                return
+            entries = {}
+            if mtime is not None:
+                with open(self.path) as f:
+                    manifest = json.load(f)
+                for data in manifest.get("models", []):
+                    entry = ModelEntry.from_dict(data)
+                    entries[entry.name] = entry
+            self._entries, self._mtime = entries, mtime
+
+    def entries(self):
+        self._refresh()
+        return list(self._entries.values())
+
+    def get(self, name):
+        self._refresh()
+        if name not in self._entries:
+            raise KeyError(f"No model {name!r} in {self.path}")
+        return self._entries[name]
+
+    def find(self, tickers, window=WINDOW, obs_version=OBS_VERSION, n_features=0):
+        # Most recently registered model for this universe, or None
+        key = universe_key(tickers, window, obs_version, n_features)
+        matches = [entry for entry in self.entries() if entry.key == key]
+        return matches[-1] if matches else None
+
+    def register(self, name, tickers, path, window=WINDOW, obs_version=OBS_VERSION, n_features=0, **metadata):
+        metadata.setdefault("registered", datetime.now(timezone.utc).isoformat(timespec="seconds"))
+        entry = ModelEntry(name, tickers, path, window, obs_version, n_features, metadata)
+
+        self._refresh()
+        with self._lock:
+            entries = {n: e for n, e in self._entries.items() if n != name}
+            entries[name] = entry
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump(
+                    {"version": REGISTRY_VERSION, "models": [e.to_dict() for e in entries.values()]},
+                    f,
+                    indent=2
+                )
+            os.replace(tmp, self.path)
+            self._entries, self._mtime = entries, _mtime(self.path)
+
+        return entry
+
+    def artifact_path(self, entry):
+        path = Path(entry.path)
+        return path if path.is_absolute() else self.path.parent / path
+
+    @profiled()
+    def load(self, model, local=False):
+        # `model` is a name or a ModelEntry; returns the resident agent,
+        # loading (and validating) it first if needed. With RL_INFERENCE_URL
+        # set, the model that server serves comes back as an InferenceClient
+        # unless local=True.
+        entry = model if isinstance(model, ModelEntry) else self.get(model)
+        path = self.artifact_path(entry)
+        zip_path, npz_path = agent_files(path)
+        if _mtime(zip_path) is None and _mtime(npz_path) is None:
+            raise FileNotFoundError(f"No agent for model {entry.name!r} at {path}")
+
+        # A retrained artifact gets a new key; the stale one ages out of the LRU
+        key = (entry.name, str(path), _mtime(zip_path), _mtime(npz_path), local)
+        return self._agents.get_or_compute(key, lambda: self._load(entry, path, local))
+
+    def _load(self, entry, path, local):
+        client = None if local else remote_agent(entry.name, lambda: self._load_local(entry, path))
+        if client is not None:
+            try:
+                validate_policy(client, entry)
+                return client
+            except ValueError as e:
+                client.close()
+                warnings.warn(f"{e}; loading {entry.name!r} locally")
+
+        return self._load_local(entry, path)
+
+    def _load_local(self, entry, path):
+        agent = read_agent(str(path), local=True)
+        validate_policy(agent, entry)
+        return agent
+
+    def stats(self):
+        return self._agents.stats()
+
+    def evict_all(self):
+        self._agents.clear()
+
+
+def get_registry(path=None):
+    # One registry (and one set of resident agents) per manifest per process
+    path = Path(path or MODEL_REGISTRY_PATH)
+    with _registries_lock:
+        if path not in _registries:
+            _registries[path] = ModelRegistry(path)
+        return _registries[path]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or update the model registry")
+    parser.add_argument("--registry", default=None, help=f"defaults to {MODEL_REGISTRY_PATH}")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("list", help="list registered models")
+
+    p_reg = sub.add_parser("register", help="add or replace a model")
+    p_reg.add_argument("name")
+    p_reg.add_argument("path", help="agent path without extension, relative to the registry")
+    p_reg.add_argument("--tickers", nargs="+", required=True)
+    p_reg.add_argument("--window", type=int, default=WINDOW)
+    p_reg.add_argument("--n-features", type=int, default=0)
+
+    sub.add_parser("check", help="load every model and validate its shapes")
+
+    args = parser.parse_args()
+    registry = ModelRegistry(args.registry)
+
+    if args.command == "register":
+        entry = registry.register(args.name, args.tickers, args.path, args.window, n_features=args.n_features)
+        print(f"Registered {entry.name}: {', '.join(entry.tickers)} (window {entry.window})")
+    elif args.command == "list":
+        for entry in registry.entries():
+            print(f"{entry.name:<28} {', '.join(entry.tickers):<40} window {entry.window:<4} "
+                  f"features {entry.n_features:<3} {entry.path}")
+    else:
+        failed = 0
+        for entry in registry.entries():
+            try:
+                agent = registry.load(entry)
+                print(f"{entry.name:<28} ok ({type(agent).__name__})")
+            except (OSError, ValueError) as e:
+                failed += 1
+                print(f"{entry.name:<28} FAILED: {e}")
+            registry.evict_all()
+        raise SystemExit(1 if failed else 0)
@@ -1,13 +1,179 @@
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 
-def monte_carlo_simulation(returns, weights, n_sims=500):
-    mean = returns.mean().values
-    cov = returns.cov().values
+from utils.cache import cached
+from utils.covariance import FactorCovariance, estimate_covariance
+from utils.path_stats import PathStatsAccumulator
+from utils.profiling import profiled
+
+HORIZON = 252
+CHUNK_SIZE = 10_000  # paths drawn per matrix operation
+MAX_CHUNK_ELEMENTS = 2**24  # caps a chunk's (paths x horizon x assets) draw
+NAV_STATS_SEED = 0  # fixed, so a rerun shows the same fan and VaR
+
+
+def covariance_factor(cov):
+    # L with L @ L.T == cov; falls back to an eigen-factor when cov is only
+    # positive semi-definite (e.g. more assets than observations). A
+    # FactorCovariance is already factored and is sampled directly.
+    if isinstance(cov, FactorCovariance):
+        return cov
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        vals, vecs = np.linalg.eigh(cov)
+        return vecs * np.sqrt(np.clip(vals, 0, None))
+
+
+def _seed_sequences(seed, n):
+    if isinstance(seed, np.random.Generator):
+        seed = int(seed.integers(2**63))
+    return np.random.SeedSequence(seed).spawn(n)
+
+
+def _chunk_sizes(n_sims, chunk_size, per_path=1):
+    # Large universes shrink the chunk so one draw stays ~MAX_CHUNK_ELEMENTS
+    chunk_size = max(1, min(chunk_size, MAX_CHUNK_ELEMENTS // per_path))
+    full, rest = divmod(n_sims, chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+
+def _moments(returns, cov_method):
+    returns = np.asarray(returns, dtype=np.float64)
+    return returns.mean(axis=0), estimate_covariance(returns, cov_method)
+
+
+def _draw_asset_chunk(mean, factor, horizon, size, seed_seq, dtype):
+    rng = np.random.default_rng(seed_seq)
+    if isinstance(factor, FactorCovariance):
+        # O(n·k) per draw: factor shocks through the loadings + idiosyncratic noise
+        return mean.astype(dtype) + factor.sample(rng, (size, horizon), dtype)
+    z = rng.standard_normal((size, horizon, factor.shape[1]), dtype=dtype)
+    return mean.astype(dtype) + z @ factor.T.astype(dtype)
+
+
+def _portfolio_chunk(args):
+    # Same draws as _draw_asset_chunk, but projected onto the weights before
+    # they are mixed, so the n x n (or n x k) product is never materialised
+    mean, factor, weights, horizon, size, seed_seq, dtype = args
+    rng = np.random.default_rng(seed_seq)
+
+    if isinstance(factor, FactorCovariance):
+        z_f = rng.standard_normal((size, horizon, factor.n_factors), dtype=dtype)
+        z_e = rng.standard_normal((size, horizon, factor.n_assets), dtype=dtype)
+        daily = (
+            z_f @ (factor.loadings.T @ weights).astype(dtype)
+            + z_e @ (np.sqrt(factor.idio) * weights).astype(dtype)
+        )
+    else:
+        z = rng.standard_normal((size, horizon, factor.shape[1]), dtype=dtype)
+        daily = z @ (factor.T @ weights).astype(dtype)
+
+    return np.cumsum(daily + dtype(mean @ weights), axis=1)
+
+
+def simulate_asset_returns(
+    returns,
+    n_sims,
+    horizon=HORIZON,
+    chunk_size=CHUNK_SIZE,
+    seed=None,
+    dtype=np.float64,
+    cov_method="sample"
+):
+    # Yields (chunk, horizon, n_assets) blocks of daily asset returns
+    mean, cov = _moments(returns, cov_method)
+    factor = covariance_factor(cov)
+
+    sizes = _chunk_sizes(n_sims, chunk_size, horizon * len(mean))
+    for size, seq in zip(sizes, _seed_sequences(seed, len(sizes))):
+        yield _draw_asset_chunk(mean, factor, horizon, size, seq, dtype)
+
+
+def simulate_portfolio_paths(
+    returns,
+    weights,
+    n_sims,
+    horizon=HORIZON,
+    chunk_size=CHUNK_SIZE,
+    seed=None,
+    dtype=np.float64,
+    n_jobs=1,
+    cov_method="sample"
+):
+    # Yields (chunk, horizon) blocks of cumulative portfolio returns. Each
+    # chunk has its own child seed, so results do not depend on n_jobs.
+    mean, cov = _moments(returns, cov_method)
+    factor = covariance_factor(cov)
+    weights = np.asarray(weights, dtype=np.float64)
+
+    sizes = _chunk_sizes(n_sims, chunk_size, horizon * len(mean))
+    jobs = [
+        (mean, factor, weights, horizon, size, seq, dtype)
+        for size, seq in zip(sizes, _seed_sequences(seed, len(sizes)))
+    ]
+
+    if n_jobs == 1 or len(jobs) == 1:
+        for job in jobs:
+            yield _portfolio_chunk(job)
+        return
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        yield from pool.map(_portfolio_chunk, jobs)
+
+
+def simulate_nav_chunks(
+    mu,
+    sigma,
+    n_sims,
+    horizon=HORIZON,
+    chunk_size=CHUNK_SIZE,
+    seed=None,
+    dtype=np.float64
+):
+    # Yields (chunk, horizon) NAV paths from i.i.d. normal daily portfolio
+    # returns, for streaming into utils.path_stats.PathStatsAccumulator
+    sizes = _chunk_sizes(n_sims, chunk_size, horizon)
+    for size, seq in zip(sizes, _seed_sequences(seed, len(sizes))):
+        rng = np.random.default_rng(seq)
+        daily = rng.standard_normal((size, horizon), dtype=dtype) * sigma + mu
+        yield np.cumprod(1 + daily, axis=1)
+
+
+@profiled()
+@cached(max_entries=16, copy=False)
+def simulate_nav_stats(mu, sigma, n_sims, horizon=HORIZON, seed=NAV_STATS_SEED):
+    # PathStatsAccumulator over simulate_nav_chunks paths. Shared between
+    # reruns and sessions, so callers only read it (fan(),
+    # terminal_var_cvar(confidence), ...)
+    stats = PathStatsAccumulator(horizon=horizon)
+    for nav in simulate_nav_chunks(float(mu), float(sigma), n_sims, horizon=horizon, seed=seed):
+        stats.update(nav)
+    return stats
 
-    sims = []
-    for _ in range(n_sims):
-        daily_returns = np.random.multivariate_normal(mean, cov, 252)
-        portfolio = np.dot(daily_returns, weights)
-        sims.append(portfolio.cumsum())
 
-    return sims
+@profiled()
+def monte_carlo_simulation(
+    returns,
+    weights,
+    n_sims=500,
+    horizon=HORIZON,
+    seed=None,
+    chunk_size=CHUNK_SIZE,
+    dtype=np.float64,
+    n_jobs=1,
+    cov_method="sample"
+):
+    # (n_sims, horizon) array of cumulative portfolio returns
+    return np.concatenate(list(simulate_portfolio_paths(
+        returns,
+        weights,
+        n_sims,
+        horizon=horizon,
+        chunk_size=chunk_size,
+        seed=seed,
+        dtype=dtype,
+        n_jobs=n_jobs,
+        cov_method=cov_method
+    )))
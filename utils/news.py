@@ -1,16 +1,142 @@
-from newsapi import NewsApiClient
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def fetch_news(ticker, api_key, page_size=5):
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.profiling import profiled
+
+# -----------------------------
+# NEWS INGESTION
+# Every request goes through one pooled HTTP session. Many tickers are
+# fetched concurrently on a bounded thread pool, rate limits (HTTP 429)
+# and transient 5xx errors are retried with exponential backoff, and
+# responses are kept in a process-wide cache for NEWS_CACHE_TTL seconds.
+# NEWS_API_URL points the client at any NewsAPI-compatible endpoint, e.g. a
+# local stand-in server for offline runs.
+# -----------------------------
+NEWS_API_URL = os.getenv("NEWS_API_URL", "https://newsapi.org/v2")
+NEWS_CACHE_TTL = float(os.getenv("NEWS_CACHE_TTL", 900))
+MAX_WORKERS = 8
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5  # seconds, doubled per retry
+MAX_BACKOFF = 30.0
+TIMEOUT = 10
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_WORKERS)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def _retry_delay(response, attempt):
+    # Honour the server's Retry-After (seconds) when present
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), MAX_BACKOFF)
+        except ValueError:
+            pass
+    return min(BACKOFF_BASE * 2 ** attempt, MAX_BACKOFF)
+
+
+def _get(url, params, api_key):
+    session = _get_session()
+    response = None
+
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = session.get(
+                url,
+                params=params,
+                headers={"X-Api-Key": api_key},
+                timeout=TIMEOUT
+            )
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == MAX_RETRIES:
+                raise
+            response = None
+        else:
+            if response.status_code not in _RETRY_STATUS or attempt == MAX_RETRIES:
+                break
+
+        time.sleep(_retry_delay(response, attempt))
+
+    response.raise_for_status()
+    return response.json()
+
+
+def clear_news_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+@profiled()
+def fetch_news(ticker, api_key, page_size=5, base_url=None, ttl=None):
     # 🔒 Force page_size to be int (fixes error)
     page_size = int(page_size)
+    base_url = base_url or NEWS_API_URL
+    ttl = NEWS_CACHE_TTL if ttl is None else ttl
 
-    newsapi = NewsApiClient(api_key=api_key)
+    key = (base_url, ticker, page_size)
+    now = time.monotonic()
+    with _cache_lock:
+        hit = _cache.get(key)
+    if hit is not None and now - hit[0] < ttl:
+        return hit[1]
 
-    response = newsapi.get_everything(
-        q=ticker,
-        language="en",
-        sort_by="relevancy",
-        page_size=page_size
+    response = _get(
+        f"{base_url}/everything",
+        {
+            "q": ticker,
+            "language": "en",
+            "sortBy": "relevancy",
+            "pageSize": page_size
+        },
+        api_key
     )
+    articles = response.get("articles", [])
+
+    with _cache_lock:
+        _cache[key] = (now, articles)
+
+    return articles
+
+
+@profiled()
+def fetch_news_bulk(tickers, api_key, page_size=5, max_workers=MAX_WORKERS, base_url=None, ttl=None):
+    # {ticker: articles} for many tickers at once. A ticker whose request
+    # still fails transiently after the retries (429 / 5xx / connection)
+    # maps to an empty list, so one bad symbol does not sink the whole
+    # universe. Other errors, e.g. 401 / 403 for a missing or invalid API
+    # key, are raised.
+    tickers = list(dict.fromkeys(tickers))
+
+    def fetch(ticker):
+        try:
+            return fetch_news(ticker, api_key, page_size, base_url=base_url, ttl=ttl)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code in _RETRY_STATUS:
+                return []
+            raise
+        except (requests.ConnectionError, requests.Timeout):
+            return []
 
-    return response.get("articles", [])
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tickers)))) as pool:
+        return dict(zip(tickers, pool.map(fetch, tickers)))
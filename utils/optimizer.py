@@ -1,20 +1,308 @@
 import numpy as np
-from scipy.optimize import minimize
+from scipy.linalg import LinAlgError, cho_factor, cho_solve
 
-def mean_variance_opt(returns):
-    cov = returns.cov() * 252
-    mean = returns.mean() * 252
-    n = len(mean)
+from utils.cache import cached
+from utils.covariance import FactorCovariance, estimate_covariance
+from utils.profiling import profiled
 
-    def objective(w):
-        return np.dot(w.T, np.dot(cov, w))
+# -----------------------------
+# LONG-ONLY QP SOLVER
+#   minimize   wᵀ Σ w - lin · w
+#   subject to sum(w) = 1, w >= 0
+# Primal-dual active set (semismooth Newton): each iteration solves the
+# KKT system on the current free set in closed form and swaps every asset
+# whose weight went negative or whose gradient 2Σw - lin says it wants in.
+# Typically converges in a handful of Cholesky solves and restarts from
+# the previous support when warm-started.
+# -----------------------------
+PDAS_MAX_ITER = 20
+ACTIVE_SET_MAX_ITER = 200
+TOL = 1e-10
 
-    constraints = (
-        {"type": "eq", "fun": lambda w: np.sum(w) - 1},
+# Relative diagonal loading. Rank-deficient covariances (more assets than
+# observations) have no unique minimum, so if the active set cycles the
+# loading is raised step by step until it settles.
+RIDGE = 1e-8
+MAX_RIDGE = 1e-2
+
+FACTOR_CACHE_SIZE = 4  # Cholesky factors kept per solve path, keyed by support
+BORDER_MAX = 32  # max assets added + dropped vs a cached factor before refactoring
+
+
+def project_simplex(v):
+    # Euclidean projection onto {w : sum(w) = 1, w >= 0}
+    u = np.sort(v)[::-1]
+    css = np.cumsum(u) - 1
+    ind = np.arange(1, len(v) + 1)
+    rho = ind[u - css / ind > 0][-1]
+    return np.maximum(v - css[rho - 1] / rho, 0)
+
+
+def _as_cov(cov):
+    # Dense arrays and FactorCovariance are both accepted everywhere below;
+    # the factor form is only ever touched through O(n·k) products/solves
+    if isinstance(cov, FactorCovariance):
+        return cov
+    return np.asarray(cov, dtype=np.float64)
+
+
+def _cov_dot(cov, w):
+    return cov.dot(w) if isinstance(cov, FactorCovariance) else w @ cov
+
+
+def _bordered_solve(cov, ridge, base_idx, factor, idx, rhs):
+    # Solve Σ_FF x = rhs for F = idx using the Cholesky of Σ_SS for a nearby
+    # support S = base_idx. Added assets A border the system and dropped
+    # assets D are pinned to zero with multipliers; the (|A| + |D|) Schur
+    # complement is the only new factorization.
+    n = len(cov)
+    in_new = np.zeros(n, dtype=bool)
+    in_new[idx] = True
+    in_base = np.zeros(n, dtype=bool)
+    in_base[base_idx] = True
+
+    added = np.flatnonzero(in_new & ~in_base)
+    keep = in_new[base_idx]
+    dropped = np.flatnonzero(~keep)
+
+    pos = np.full(n, -1)
+    pos[idx] = np.arange(len(idx))
+
+    b_base = np.zeros((len(base_idx), rhs.shape[1]))
+    b_base[keep] = rhs[pos[base_idx[keep]]]
+    b_border = np.vstack([rhs[pos[added]], np.zeros((len(dropped), rhs.shape[1]))])
+
+    border = np.zeros((len(base_idx), len(added) + len(dropped)))
+    border[:, : len(added)] = cov[np.ix_(base_idx, added)]
+    border[dropped, len(added) + np.arange(len(dropped))] = 1
+
+    corner = np.zeros((border.shape[1], border.shape[1]))
+    corner[: len(added), : len(added)] = cov[np.ix_(added, added)] + ridge * np.eye(len(added))
+
+    inv_border = cho_solve(factor, border, check_finite=False)
+    inv_b = cho_solve(factor, b_base, check_finite=False)
+
+    u = np.linalg.solve(corner - border.T @ inv_border, b_border - border.T @ inv_b)
+    x_base = inv_b - inv_border @ u
+
+    x = np.empty_like(rhs)
+    x[pos[base_idx[keep]]] = x_base[keep]
+    x[pos[added]] = u[: len(added)]
+    return x
+
+
+def _support_solve(cov, ridge, idx, rhs, factors):
+    # (Σ_FF + ridge I)⁻¹ rhs, reusing a cached Cholesky for this or a nearby support
+    if isinstance(cov, FactorCovariance):
+        return cov.solve(idx, rhs, ridge)
+
+    if factors is not None:
+        key = idx.tobytes()
+        if key in factors:
+            factor = factors[key][1]
+            if factor is not False:
+                return cho_solve(factor, rhs, check_finite=False)
+        else:
+            for base_idx, factor in factors.values():
+                if factor is False:
+                    continue
+                changed = len(np.setxor1d(base_idx, idx, assume_unique=True))
+                if changed <= BORDER_MAX:
+                    try:
+                        return _bordered_solve(cov, ridge, base_idx, factor, idx, rhs)
+                    except np.linalg.LinAlgError:
+                        break
+
+    sub = cov[np.ix_(idx, idx)] + ridge * np.eye(len(idx))
+    try:
+        factor = cho_factor(sub, check_finite=False)
+    except LinAlgError:
+        factor = False
+
+    if factors is not None:
+        if len(factors) >= FACTOR_CACHE_SIZE:
+            factors.pop(next(iter(factors)))
+        factors[idx.tobytes()] = (idx, factor)
+
+    if factor is False:
+        return np.linalg.lstsq(sub, rhs, rcond=None)[0]
+    return cho_solve(factor, rhs, check_finite=False)
+
+
+def _solve_on_support(cov, ridge, lin, idx, factors=None):
+    # KKT on the free set: 2 Σ_FF w - lam 1 = lin_F, 1ᵀ w = 1, via
+    # Σ_FF⁻¹1 and Σ_FF⁻¹lin from one factorization. `factors` caches
+    # Cholesky factors by support, so re-solves on the same or a nearby free
+    # set with a different `lin` (frontier sweeps) skip the factorization.
+    rhs = np.column_stack([np.ones(len(idx)), lin[idx]])
+    inv_one, inv_lin = _support_solve(cov, ridge, idx, rhs, factors).T
+
+    lam = (2 - inv_one @ lin[idx]) / inv_one.sum()
+    return (inv_lin + lam * inv_one) / 2, lam
+
+
+def _primal_dual_active_set(cov, ridge, lin, free, max_iter, tol, factors=None):
+    # Returns the optimum, or None if the free set did not settle
+    for _ in range(max_iter):
+        idx = np.flatnonzero(free)
+        if idx.size == 0:
+            return None
+        w_free, lam = _solve_on_support(cov, ridge, lin, idx, factors)
+
+        w = np.zeros(len(lin))
+        w[idx] = w_free
+        # Only rows off the free set matter, where the ridge term is zero
+        if isinstance(cov, FactorCovariance):
+            slack = 2 * cov.dot(w) - lin - lam
+        else:
+            slack = 2 * (w_free @ cov[idx]) - lin - lam
+        slack[idx] = 0
+
+        drop = w < -tol
+        add = slack < -tol * max(1.0, abs(lam))
+        if not drop.any() and not add.any():
+            w = np.maximum(w, 0)
+            return w / w.sum()
+
+        free = (free & ~drop) | add
+
+    return None
+
+
+def _active_set(cov, ridge, lin, w, max_iter, tol):
+    # Classic primal active set from a feasible point: one asset enters or
+    # leaves per KKT solve. Slow on big supports but always terminates.
+    free = w > 0
+
+    for _ in range(max_iter):
+        idx = np.flatnonzero(free)
+        w_free, lam = _solve_on_support(cov, ridge, lin, idx)
+
+        if w_free.min() < -tol:
+            # Move toward the support optimum until a weight hits zero; drop it
+            d = np.zeros_like(w)
+            d[idx] = w_free - w[idx]
+            shrinking = idx[d[idx] < 0]
+            ratios = w[shrinking] / -d[shrinking]
+            j = np.argmin(ratios)
+            w = np.maximum(w + min(ratios[j], 1.0) * d, 0)
+            w[shrinking[j]] = 0
+            free[shrinking[j]] = False
+            continue
+
+        w = np.zeros_like(w)
+        w[idx] = np.maximum(w_free, 0)
+        w /= w.sum()
+
+        # KKT: assets held at zero must not want to enter (grad_i >= lam)
+        bound = np.flatnonzero(~free)
+        if bound.size == 0:
+            break
+        slack = (2 * _cov_dot(cov, w)[bound] - lin[bound]) - lam
+        j = np.argmin(slack)
+        if slack[j] >= -tol * max(1.0, abs(lam)):
+            break
+        free[bound[j]] = True
+
+    return w
+
+
+@profiled()
+def solve_long_only_qp(cov, lin=None, w0=None, tol=TOL, factor_cache=None):
+    cov = _as_cov(cov)
+    n = cov.n_assets if isinstance(cov, FactorCovariance) else len(cov)
+    lin = np.zeros(n) if lin is None else np.asarray(lin, dtype=np.float64)
+
+    if w0 is None:
+        w = np.ones(n) / n
+    else:
+        # Only project infeasible warm starts: projecting a point already on
+        # the simplex can smear round-off mass onto its zero weights
+        w = np.asarray(w0, dtype=np.float64)
+        if w.min() < 0 or abs(w.sum() - 1) > 1e-9:
+            w = project_simplex(w)
+
+    scale = (cov.diag() if isinstance(cov, FactorCovariance) else np.diag(cov)).mean()
+    ridge = RIDGE
+
+    while True:
+        factors = None if factor_cache is None else factor_cache.setdefault(ridge, {})
+        w_opt = _primal_dual_active_set(
+            cov, ridge * scale, lin, w > 0, PDAS_MAX_ITER, tol, factors
+        )
+        if w_opt is not None:
+            return w_opt
+        if ridge >= MAX_RIDGE:
+            return _active_set(cov, ridge * scale, lin, w, ACTIVE_SET_MAX_ITER, tol)
+        ridge *= 100
+
+
+def min_variance_weights(cov, w0=None):
+    return solve_long_only_qp(cov, w0=w0)
+
+
+# Not cached: one solve costs less than hashing the returns frame for a
+# cache key once the universe is large
+@profiled()
+def mean_variance_opt(returns, w0=None, cov_method="sample"):
+    cov = estimate_covariance(returns, cov_method) * 252
+    return min_variance_weights(cov, w0=w0)
+
+
+# -----------------------------
+# EFFICIENT FRONTIER
+#   minimize wᵀ Σ w - γ μᵀ w for a grid of risk aversions γ, from the
+#   minimum-variance portfolio (γ = 0) to the all-in max-return asset.
+# Each point warm-starts from its neighbour and shares a Cholesky cache,
+# so consecutive points on the same or a nearby support need no new
+# factorization of the covariance.
+# -----------------------------
+def risk_aversion_grid(cov, mean, n_points=50):
+    cov = _as_cov(cov)
+    mean = np.asarray(mean, dtype=np.float64)
+
+    # Smallest γ at which holding only the best asset satisfies the KKT
+    # conditions: γ (μ_k - μ_i) >= 2 (Σ_kk - Σ_ik) for every i
+    k = np.argmax(mean)
+    lower = mean < mean[k]
+    if not lower.any():
+        return np.zeros(1)
+
+    col = cov.column(k) if isinstance(cov, FactorCovariance) else cov[:, k]
+    gamma_max = np.max(
+        2 * (col[k] - col[lower]) / (mean[k] - mean[lower])
     )
+    if gamma_max <= 0:
+        return np.zeros(1)
+
+    return np.concatenate([[0.0], np.geomspace(gamma_max / 1000, gamma_max, n_points - 1)])
+
+
+@profiled()
+def efficient_frontier(cov, mean, n_points=50, risk_aversions=None):
+    cov = _as_cov(cov)
+    mean = np.asarray(mean, dtype=np.float64)
+
+    if risk_aversions is None:
+        risk_aversions = risk_aversion_grid(cov, mean, n_points)
+
+    weights = np.empty((len(risk_aversions), len(mean)))
+    factor_cache = {}
+    w = None
+
+    for i, gamma in enumerate(risk_aversions):
+        w = solve_long_only_qp(cov, lin=gamma * mean, w0=w, factor_cache=factor_cache)
+        weights[i] = w
+
+    risk = np.sqrt(np.sum(_cov_dot(cov, weights) * weights, axis=1))
+    ret = weights @ mean
+
+    return weights, risk, ret
 
-    bounds = tuple((0, 1) for _ in range(n))
-    w0 = np.ones(n) / n
 
-    result = minimize(objective, w0, bounds=bounds, constraints=constraints)
-    return result.x
+@profiled()
+@cached(max_entries=256)
+def mean_variance_frontier(returns, n_points=50, cov_method="sample"):
+    cov = estimate_covariance(returns, cov_method) * 252
+    mean = np.asarray(returns.mean()) * 252
+    return efficient_frontier(cov, mean, n_points=n_points)
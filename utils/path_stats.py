@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+FAN_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+class PathStatsAccumulator:
+    # Streaming per-horizon statistics over simulated NAV paths.
+    # Consumes (chunk, horizon) blocks and keeps, per horizon step, running
+    # moments plus a fixed-size histogram; memory is O(horizon * n_bins)
+    # no matter how many paths are pushed through.
+    #
+    # Bin ranges are set from the first chunk, widened by `margin` times its
+    # spread on each side. Values outside fall into under/overflow bins whose
+    # edges are the exact running min/max, and the terminal histogram also
+    # keeps per-bin sums so tail means (CVaR) are exact for full bins.
+
+    def __init__(self, horizon, n_bins=4096, margin=2.0):
+        self.horizon = horizon
+        self.n_bins = n_bins
+        self.margin = margin
+
+        self.count = 0
+        self._mean = np.zeros(horizon)
+        self._m2 = np.zeros(horizon)
+        self._min = np.full(horizon, np.inf)
+        self._max = np.full(horizon, -np.inf)
+
+        self._lo = None
+        self._width = None
+        self._counts = np.zeros((horizon, n_bins + 2), dtype=np.int64)
+        self._terminal_sums = np.zeros(n_bins + 2)
+
+    def _init_bins(self, paths):
+        lo, hi = paths.min(axis=0), paths.max(axis=0)
+        spread = np.maximum(hi - lo, 1e-12)
+        self._lo = lo - self.margin * spread
+        self._width = (1 + 2 * self.margin) * spread / self.n_bins
+
+    def update(self, paths):
+        paths = np.asarray(paths, dtype=np.float64)
+        if paths.ndim != 2 or paths.shape[1] != self.horizon:
+            raise ValueError(
+                f"Expected (n_paths, {self.horizon}) paths, got {paths.shape}"
+            )
+        if self._lo is None:
+            self._init_bins(paths)
+
+        # Chan et al. parallel update of mean / M2
+        n = len(paths)
+        total = self.count + n
+        chunk_mean = paths.mean(axis=0)
+        delta = chunk_mean - self._mean
+        self._mean += delta * n / total
+        self._m2 += ((paths - chunk_mean) ** 2).sum(axis=0) + delta ** 2 * self.count * n / total
+        self.count = total
+
+        np.minimum(self._min, paths.min(axis=0), out=self._min)
+        np.maximum(self._max, paths.max(axis=0), out=self._max)
+
+        # Bin 0 = underflow, bins 1..n_bins = histogram, last = overflow
+        idx = np.floor((paths - self._lo) / self._width).astype(np.int64) + 1
+        np.clip(idx, 0, self.n_bins + 1, out=idx)
+
+        width = self.n_bins + 2
+        flat = idx + np.arange(self.horizon) * width
+        self._counts += np.bincount(
+            flat.ravel(), minlength=self.horizon * width
+        ).reshape(self.horizon, width)
+
+        self._terminal_sums += np.bincount(
+            idx[:, -1], weights=paths[:, -1], minlength=width
+        )
+
+    # -----------------------------
+    # RESULTS
+    # -----------------------------
+    def mean(self):
+        return self._mean.copy()
+
+    def std(self):
+        return np.sqrt(self._m2 / max(self.count - 1, 1))
+
+    def _edges(self):
+        # (horizon, n_bins + 3) bin edges including under/overflow bins
+        inner = self._lo[:, None] + self._width[:, None] * np.arange(self.n_bins + 1)
+        lo = np.minimum(self._min, inner[:, 0])[:, None]
+        hi = np.maximum(self._max, inner[:, -1])[:, None]
+        return np.hstack([lo, inner, hi])
+
+    def quantiles(self, percentiles=FAN_PERCENTILES):
+        if self.count == 0:
+            raise ValueError("No paths accumulated yet")
+
+        edges = self._edges()
+        cum = np.cumsum(self._counts, axis=1)
+        rows = np.arange(self.horizon)
+
+        out = np.empty((len(percentiles), self.horizon))
+        for i, p in enumerate(percentiles):
+            target = p / 100 * self.count
+            b = np.argmax(cum >= target, axis=1)
+            below = np.where(b > 0, cum[rows, b - 1], 0)
+            in_bin = np.maximum(self._counts[rows, b], 1)
+            frac = np.clip((target - below) / in_bin, 0, 1)
+            out[i] = edges[rows, b] + frac * (edges[rows, b + 1] - edges[rows, b])
+
+        return out
+
+    def fan(self, percentiles=FAN_PERCENTILES):
+        q = self.quantiles(percentiles)
+        names = ["Median" if p == 50 else f"P{p}" for p in percentiles]
+        return pd.DataFrame(dict(zip(names, q)))
+
+    def terminal_var_cvar(self, confidence=0.95):
+        # VaR / CVaR of the terminal return (NAV - 1) at the given confidence
+        p = (1 - confidence) * 100
+        var_nav = self.quantiles([p])[0, -1]
+
+        counts = self._counts[-1]
+        edges = self._edges()[-1]
+        target = p / 100 * self.count
+
+        # Whole bins strictly below the VaR bin contribute their exact sums;
+        # the VaR bin contributes pro rata at its mean.
+        cum = np.cumsum(counts)
+        b = int(np.argmax(cum >= target))
+        below = cum[b - 1] if b > 0 else 0
+        tail_sum = self._terminal_sums[:b].sum()
+        take = target - below
+        if counts[b] > 0:
+            tail_sum += take * self._terminal_sums[b] / counts[b]
+        else:
+            tail_sum += take * (edges[b] + edges[b + 1]) / 2
+        cvar_nav = tail_sum / max(target, 1e-12)
+
+        return var_nav - 1, cvar_nav - 1
@@ -0,0 +1,188 @@
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# -----------------------------
+# TORCH-FREE POLICY
+# The deterministic PPO action is the actor MLP's mean output, clipped to
+# the action box. export_policy() writes those layers (weights, biases,
+# activation) plus the observation layout to a small .npz, and
+# NumpyPolicy replays the forward pass as plain matmuls. It exposes the
+# same predict() as the SB3 agent, so get_rl_weights / backtest_rl take
+# either one.
+# -----------------------------
+FORMAT_VERSION = 1
+
+_ACTIVATIONS = {
+    "Tanh": np.tanh,
+    "ReLU": lambda x: np.maximum(x, 0),
+    "ELU": lambda x: np.where(x > 0, x, np.expm1(np.minimum(x, 0))),
+    "LeakyReLU": lambda x: np.where(x > 0, x, 0.01 * x),
+    "Identity": lambda x: x,
+}
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _registry_entry(agent_path, registry=None):
+    # Model registry entry whose artifact is this saved agent, or None
+    from utils.model_registry import get_registry
+
+    registry = get_registry(registry)
+    base = os.path.realpath(agent_path.removesuffix(".zip"))
+    matches = [
+        entry for entry in registry.entries()
+        if os.path.realpath(registry.artifact_path(entry)) == base
+    ]
+    return matches[-1] if matches else None
+
+
+def export_policy(agent, path, window=None, n_features=None, registry=None):
+    # `agent` is an SB3 PPO instance or the path of a saved one; exports
+    # from a file record its hash so stale exports can be detected. The
+    # observation layout (window, feature channels) comes from the
+    # arguments, else the agent's model registry entry, else is inferred
+    # from the policy's input size assuming no extra features.
+    import torch
+
+    from utils.rl_inference import observation_dim
+
+    source = None
+    if isinstance(agent, str):
+        from stable_baselines3 import PPO
+        zip_path = agent if agent.endswith(".zip") else f"{agent}.zip"
+        source = file_digest(zip_path) if os.path.exists(zip_path) else None
+
+        entry = _registry_entry(agent, registry)
+        if entry is not None:
+            window = entry.window if window is None else window
+            n_features = entry.n_features if n_features is None else n_features
+        agent = PPO.load(agent, device="cpu")
+
+    policy = agent.policy
+    if policy.squash_output:
+        raise ValueError("Exporting squashed (tanh) action outputs is not supported")
+    if type(policy.features_extractor).__name__ != "FlattenExtractor":
+        raise ValueError(
+            f"Only FlattenExtractor policies can be exported, got "
+            f"{type(policy.features_extractor).__name__}"
+        )
+
+    layers = []
+    activation = "Identity"
+    for module in policy.mlp_extractor.policy_net:
+        if isinstance(module, torch.nn.Linear):
+            layers.append(module)
+        elif type(module).__name__ in _ACTIVATIONS:
+            activation = type(module).__name__
+        else:
+            raise ValueError(f"Unsupported layer in policy net: {module}")
+    layers.append(policy.action_net)
+
+    arrays = {}
+    for i, layer in enumerate(layers):
+        arrays[f"w{i}"] = layer.weight.detach().cpu().numpy().T.astype(np.float32)
+        arrays[f"b{i}"] = layer.bias.detach().cpu().numpy().astype(np.float32)
+
+    obs_dim = int(np.prod(agent.observation_space.shape))
+    n_assets = int(np.prod(agent.action_space.shape))
+    n_features = n_features or 0
+    if window is None:
+        # Observation layout: window x n returns | n vols | n x n correlations
+        # | n x n_features extra features
+        window = (obs_dim - n_assets - n_assets ** 2 - n_assets * n_features) // n_assets
+    if window < 1 or observation_dim(n_assets, window, n_features) != obs_dim:
+        raise ValueError(
+            f"Policy takes {obs_dim} observations, which window {window} and "
+            f"{n_features} feature channels for {n_assets} assets do not give; "
+            f"register the model or pass its window and feature count"
+        )
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "activation": activation,
+        "n_layers": len(layers),
+        "obs_dim": obs_dim,
+        "n_assets": n_assets,
+        "window": int(window),
+        "n_features": int(n_features),
+        "source_sha256": source,
+    }
+
+    np.savez_compressed(
+        path,
+        meta=np.array(json.dumps(meta)),
+        action_low=agent.action_space.low.astype(np.float32),
+        action_high=agent.action_space.high.astype(np.float32),
+        **arrays
+    )
+    return meta
+
+
+class NumpyPolicy:
+    def __init__(self, weights, biases, activation, action_low, action_high, meta):
+        self.weights = weights
+        self.biases = biases
+        self.activation = _ACTIVATIONS[activation]
+        self.action_low = action_low
+        self.action_high = action_high
+        self.meta = meta
+
+        self.obs_dim = meta["obs_dim"]
+        self.n_assets = meta["n_assets"]
+        self.window = meta["window"]
+        self.n_features = meta.get("n_features", 0)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["format_version"] != FORMAT_VERSION:
+                raise ValueError(
+                    f"Unsupported policy format {meta['format_version']} in {path}"
+                )
+            n = meta["n_layers"]
+            weights = [data[f"w{i}"] for i in range(n)]
+            biases = [data[f"b{i}"] for i in range(n)]
+            low, high = data["action_low"], data["action_high"]
+
+        return cls(weights, biases, meta["activation"], low, high, meta)
+
+    def forward(self, obs):
+        x = np.asarray(obs, dtype=np.float32)
+        for w, b in zip(self.weights[:-1], self.biases[:-1]):
+            x = self.activation(x @ w + b)
+        return x @ self.weights[-1] + self.biases[-1]
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=True):
+        # Same contract as BaseAlgorithm.predict for the deterministic action
+        if not deterministic:
+            raise ValueError("NumpyPolicy only serves deterministic actions")
+
+        obs = np.asarray(observation, dtype=np.float32)
+        single = obs.ndim == 1
+        obs = obs.reshape(-1, self.obs_dim)
+
+        actions = np.clip(self.forward(obs), self.action_low, self.action_high)
+        return (actions[0] if single else actions), None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the PPO policy to a torch-free .npz")
+    parser.add_argument("agent", nargs="?", default="ppo_portfolio_agent")
+    parser.add_argument("-o", "--output", default=None, help="defaults to <agent>.npz")
+    parser.add_argument("--window", type=int, default=None, help="defaults to the model registry entry's")
+    parser.add_argument("--n-features", type=int, default=None, help="defaults to the model registry entry's")
+    parser.add_argument("--registry", default=None, help="model registry manifest to read the layout from")
+    args = parser.parse_args()
+
+    output = args.output or f"{args.agent.removesuffix('.zip')}.npz"
+    meta = export_policy(args.agent, output, args.window, args.n_features, args.registry)
+    print(f"Exported {meta['n_layers']}-layer {meta['activation']} policy "
+          f"({meta['obs_dim']} -> {meta['n_assets']}) to {output}")
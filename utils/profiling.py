@@ -0,0 +1,217 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# -----------------------------
+# STAGE TIMING
+# `profiled` (decorator) and `stage` (context manager) record wall time,
+# call counts and, optionally, the tracemalloc peak of each named stage.
+# When profiling is off both reduce to a single flag check, so they can
+# stay on hot utils functions permanently.
+#
+# Totals are kept per process; the stages of the current page run are
+# also kept per thread (Streamlit runs each script run on its own
+# thread), starting from the last start_run() call.
+#
+# PROFILING=1 / enable() turn recording on for the whole process;
+# start_run(enabled=True) turns it on for the current run's thread only,
+# so one session profiling does not slow down the others. Peak memory
+# (tracemalloc) is process-global and only switched on by PROFILE_MEMORY=1
+# together with PROFILING=1; concurrent runs then share one peak counter.
+# -----------------------------
+PROFILING = os.getenv("PROFILING", "0") == "1"
+PROFILE_MEMORY = os.getenv("PROFILE_MEMORY", "0") == "1"
+PROFILE_LOG = os.getenv("PROFILE_LOG", "profile.log")
+MAX_RUN_EVENTS = 1000
+
+_enabled = PROFILING
+_memory = False
+
+_stats = {}  # name -> [count, total_s, min_s, max_s, peak_bytes]
+_stats_lock = threading.Lock()
+_local = threading.local()
+
+
+def enable(memory=False):
+    global _enabled, _memory
+    _enabled = True
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not memory and _memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _memory = memory
+
+
+def disable():
+    global _enabled, _memory
+    _enabled = False
+    if _memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _memory = False
+
+
+def is_enabled():
+    # Recording for the current thread
+    return _enabled or getattr(_local, "enabled", False)
+
+
+def memory_enabled():
+    return _memory
+
+
+def _frames():
+    frames = getattr(_local, "frames", None)
+    if frames is None:
+        frames = _local.frames = []
+    return frames
+
+
+def _record(name, start, seconds, peak):
+    with _stats_lock:
+        entry = _stats.get(name)
+        if entry is None:
+            _stats[name] = [1, seconds, seconds, seconds, peak or 0]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = min(entry[2], seconds)
+            entry[3] = max(entry[3], seconds)
+            entry[4] = max(entry[4], peak or 0)
+
+    events = getattr(_local, "events", None)
+    if events is not None and len(events) < MAX_RUN_EVENTS:
+        events.append({
+            "stage": name,
+            "start_s": start - getattr(_local, "run_start", start),
+            "depth": len(_frames()),
+            "seconds": seconds,
+            "peak_bytes": peak,
+        })
+
+
+class stage:
+    __slots__ = ("name", "_start", "_mem_start", "_peak")
+
+    def __init__(self, name):
+        self.name = name
+        self._start = None
+
+    def __enter__(self):
+        if not (_enabled or getattr(_local, "enabled", False)):
+            return self
+
+        if _memory and tracemalloc.is_tracing():
+            # Peaks are measured from this stage's own starting point; a
+            # nested stage resets the counter, so its peak is handed back
+            # to the enclosing stage on exit
+            self._mem_start = tracemalloc.get_traced_memory()[0]
+            self._peak = self._mem_start
+            tracemalloc.reset_peak()
+        else:
+            self._mem_start = None
+
+        _frames().append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._start is None:
+            return False
+
+        seconds = time.perf_counter() - self._start
+        frames = _frames()
+        if frames and frames[-1] is self:
+            frames.pop()
+
+        peak = None
+        if self._mem_start is not None and tracemalloc.is_tracing():
+            absolute = max(self._peak, tracemalloc.get_traced_memory()[1])
+            peak = absolute - self._mem_start
+            if frames and frames[-1]._mem_start is not None:
+                frames[-1]._peak = max(frames[-1]._peak, absolute)
+
+        _record(self.name, self._start, seconds, peak)
+        self._start = None
+        return False
+
+
+def profiled(name=None):
+    def decorator(fn):
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not (_enabled or getattr(_local, "enabled", False)):
+                return fn(*args, **kwargs)
+            with stage(label):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# -----------------------------
+# REPORTING
+# -----------------------------
+def start_run(enabled=False):
+    # `enabled` turns recording on for this thread's run even when
+    # profiling is off process-wide
+    _local.enabled = enabled
+    _local.events = []
+    _local.frames = []
+    _local.run_start = time.perf_counter()
+
+
+def run_events():
+    # Stages of the current run in start order
+    return sorted(getattr(_local, "events", None) or [], key=lambda e: e["start_s"])
+
+
+def stats():
+    with _stats_lock:
+        items = [(name, list(entry)) for name, entry in _stats.items()]
+
+    return sorted(
+        (
+            {
+                "stage": name,
+                "calls": count,
+                "total_s": total,
+                "mean_s": total / count,
+                "min_s": low,
+                "max_s": high,
+                "peak_bytes": peak or None,
+            }
+            for name, (count, total, low, high, peak) in items
+        ),
+        key=lambda row: row["total_s"],
+        reverse=True
+    )
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def dump_stats(path=None, label=None):
+    # Appends one JSON line (totals + the current run) to the profile log
+    path = path or PROFILE_LOG
+    record = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "label": label,
+        "stats": stats(),
+        "run": run_events(),
+    }
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    return path
+
+
+if PROFILING and PROFILE_MEMORY:
+    enable(memory=True)
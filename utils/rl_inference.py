@@ -1,31 +1,145 @@
+import http.client
+import os
+import warnings
+
 import numpy as np
-from stable_baselines3 import PPO
+
+from utils.cache import cached
+from utils.features import as_feature_array, with_features
+from utils.policy_export import NumpyPolicy, file_digest
+from utils.profiling import profiled
+from utils.rolling_stats import RollingWindowStats, rolling_observations
 
 WINDOW = 20
 N_ASSETS = 4  # MUST MATCH TRAINING
+PREDICT_CHUNK = 4096  # rows per policy forward pass in batched inference
+OBS_VERSION = 1  # observation layout, see observation_dim()
+RL_INFERENCE_URL = os.getenv("RL_INFERENCE_URL")  # see utils.inference_server
+
+def agent_files(path):
+    base = str(path).removesuffix(".zip").removesuffix(".npz")
+    return f"{base}.zip", f"{base}.npz"
+
+def _mtime(path):
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+def _agent_key(path="ppo_portfolio_agent", local=False):
+    # Reload when the saved agent or its export changes on disk
+    zip_path, npz_path = agent_files(path)
+    return str(path), _mtime(zip_path), _mtime(npz_path), local or RL_INFERENCE_URL
+
+def agent_name(path):
+    # Model name of a saved agent: its file name without extension
+    return os.path.basename(agent_files(path)[0]).removesuffix(".zip")
 
-def load_rl_agent(path="ppo_portfolio_agent"):
+def remote_agent(name, fallback=None):
+    # InferenceClient for RL_INFERENCE_URL if that server is up and serves
+    # the model `name`, otherwise None (the caller loads locally).
+    # `fallback` loads the model locally should the server go away later.
+    if not RL_INFERENCE_URL:
+        return None
+
+    from utils.inference_server import InferenceClient
+    client = InferenceClient(RL_INFERENCE_URL, fallback=fallback)
+    try:
+        client.health()
+    except (OSError, RuntimeError, ValueError, http.client.HTTPException) as e:
+        client.close()
+        warnings.warn(f"RL inference server {RL_INFERENCE_URL} unavailable ({e}); loading locally")
+        return None
+    if client.model != name:
+        client.close()
+        return None
+    return client
+
+def read_agent(path="ppo_portfolio_agent", local=False):
+    # Uncached load; callers that keep their own set of resident agents
+    # (utils.model_registry) use this directly.
+    # With RL_INFERENCE_URL set this is a client of the shared
+    # micro-batching server when it serves this agent.
+    if not local:
+        client = remote_agent(agent_name(path), lambda: read_agent(path, local=True))
+        if client is not None:
+            return client
+
+    # An exported policy (python -m utils.policy_export) made from this
+    # exact zip is served with NumPy alone, without importing torch /
+    # stable_baselines3.
+    zip_path, npz_path = agent_files(path)
+    if os.path.exists(npz_path):
+        policy = NumpyPolicy.load(npz_path)
+        source = policy.meta.get("source_sha256")
+        if not os.path.exists(zip_path) or source == file_digest(zip_path):
+            return policy
+
+    from stable_baselines3 import PPO
     return PPO.load(path)
 
-def get_rl_weights(agent, returns):
-    if returns.shape[1] != N_ASSETS:
+@profiled()
+@cached(max_entries=4, key=_agent_key, copy=False)
+def load_rl_agent(path="ppo_portfolio_agent", local=False):
+    # One shared instance per saved agent; inference never mutates it
+    return read_agent(path, local)
+
+def policy_dims(agent):
+    # (observation size, number of assets) the policy was built for, or
+    # None when it cannot tell
+    if getattr(agent, "obs_dim", None) is not None and getattr(agent, "n_assets", None) is not None:
+        return int(agent.obs_dim), int(agent.n_assets)
+    if hasattr(agent, "observation_space") and hasattr(agent, "action_space"):
+        return int(np.prod(agent.observation_space.shape)), int(np.prod(agent.action_space.shape))
+    return None
+
+def observation_dim(n_assets, window=WINDOW, n_features=0):
+    # OBS_VERSION 1 layout: window x n returns | n vols | n x n correlations
+    # | n x n_features extra features
+    return n_assets * window + n_assets + n_assets ** 2 + n_assets * n_features
+
+def _check_assets(agent, returns):
+    dims = policy_dims(agent)
+    n_assets = dims[1] if dims else N_ASSETS
+    if returns.shape[1] != n_assets:
         raise ValueError(
-            f"Expected {N_ASSETS} assets, got {returns.shape[1]}"
+            f"Expected {n_assets} assets, got {returns.shape[1]}"
         )
+    return n_assets
 
-    window_returns = returns[-WINDOW:]
-    vol = window_returns.std(axis=0)
-    corr = np.corrcoef(window_returns.T)
-
-    obs = np.concatenate([
-        window_returns.flatten(),
-        vol,
-        corr.flatten()
-    ])
+@profiled()
+def get_rl_weights(agent, returns, features=None, window=WINDOW):
+    n_assets = _check_assets(agent, returns)
 
+    obs = RollingWindowStats.from_returns(returns, window).observation()
+    features = as_feature_array(features, len(returns), n_assets)
+    if features is not None:
+        # Decision after the last row sees that row's features
+        obs = np.concatenate([obs, np.asarray(features[-1], dtype=np.float32).ravel()])
     obs = obs.reshape(1, -1)  # 🔑 CRITICAL FIX
 
     action, _ = agent.predict(obs, deterministic=True)
     weights = action[0] / np.sum(action[0])
 
     return weights
+
+
+@profiled()
+def get_rl_weights_batch(agent, returns, window=WINDOW, chunk_size=PREDICT_CHUNK, features=None):
+    # Weights for every decision point t in [window, len(returns)], each
+    # computed from returns[t - window : t] exactly as get_rl_weights would.
+    # The last row is the allocation for the day after the data ends.
+    # Feature rows are read one chunk at a time.
+    returns = np.asarray(returns, dtype=np.float64)
+    n_assets = _check_assets(agent, returns)
+
+    obs, _, _ = rolling_observations(returns, window)
+    features = as_feature_array(features, len(returns), n_assets)
+    t = np.arange(window, len(returns) + 1)
+
+    actions = np.concatenate([
+        agent.predict(
+            with_features(obs, features, t[i : i + chunk_size], window),
+            deterministic=True
+        )[0]
+        for i in range(0, len(obs), chunk_size)
+    ])
+
+    return actions / np.sum(actions, axis=1, keepdims=True)
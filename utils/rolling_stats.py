@@ -0,0 +1,151 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# -----------------------------
+# OBSERVATION LAYOUT (MUST MATCH TRAINING)
+#   window returns (window x n, row-major) | volatility (n) | correlation (n x n)
+# Shared by the incremental and batched paths below, which feed
+# PortfolioEnv, backtest_rl and get_rl_weights.
+# -----------------------------
+
+
+def _moments(s1, s2, count):
+    # Population (ddof=0) mean / covariance from running sums
+    mean = s1 / count
+    cov = s2 / count - mean[..., :, None] * mean[..., None, :]
+    return mean, cov
+
+
+def _vol_corr(cov):
+    var = np.maximum(np.einsum("...ii->...i", cov), 0.0)
+    vol = np.sqrt(var)
+
+    # Same normalisation and clipping as np.corrcoef
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov / vol[..., :, None] / vol[..., None, :]
+    np.clip(corr, -1, 1, out=corr)
+
+    return vol, corr
+
+
+def _assemble(window_returns, vol, corr):
+    lead = window_returns.shape[:-2]
+    return np.concatenate([
+        window_returns.reshape(*lead, -1),
+        vol,
+        corr.reshape(*lead, -1)
+    ], axis=-1).astype(np.float32)
+
+
+class RollingWindowStats:
+    # Rolling mean / covariance over the last `window` bars, kept as running
+    # sums and cross-products so each push/pop costs O(n^2).
+    # Rows live twice in a (2 * window, n) buffer so the current window is
+    # always one contiguous slice.
+
+    def __init__(self, n_assets, window=20, resync_every=1000):
+        self.n_assets = n_assets
+        self.window = window
+        self.resync_every = resync_every
+
+        self._buf = np.zeros((2 * window, n_assets))
+        self._start = 0
+        self.count = 0
+        self._pushes = 0
+
+        self._s1 = np.zeros(n_assets)
+        self._s2 = np.zeros((n_assets, n_assets))
+
+    @classmethod
+    def from_returns(cls, returns, window=20, **kwargs):
+        returns = np.asarray(returns, dtype=np.float64)
+        stats = cls(returns.shape[1], window, **kwargs)
+        for row in returns[-window:]:
+            stats.push(row)
+        return stats
+
+    @property
+    def full(self):
+        return self.count == self.window
+
+    def push(self, row):
+        row = np.asarray(row, dtype=np.float64)
+
+        if self.full:
+            self.pop()
+
+        slot = (self._start + self.count) % self.window
+        self._buf[slot] = row
+        self._buf[slot + self.window] = row
+        self.count += 1
+
+        self._s1 += row
+        self._s2 += np.outer(row, row)
+
+        # Re-derive the sums now and then so float error cannot accumulate
+        self._pushes += 1
+        if self._pushes % self.resync_every == 0:
+            self._resync()
+
+    def pop(self):
+        if self.count == 0:
+            raise IndexError("pop from empty RollingWindowStats")
+
+        row = self._buf[self._start].copy()
+        self._start = (self._start + 1) % self.window
+        self.count -= 1
+
+        self._s1 -= row
+        self._s2 -= np.outer(row, row)
+        return row
+
+    def _resync(self):
+        rows = self.window_returns
+        self._s1 = rows.sum(axis=0)
+        self._s2 = rows.T @ rows
+
+    @property
+    def window_returns(self):
+        return self._buf[self._start : self._start + self.count]
+
+    def mean(self):
+        return _moments(self._s1, self._s2, self.count)[0]
+
+    def cov(self):
+        return _moments(self._s1, self._s2, self.count)[1]
+
+    def vol(self):
+        return _vol_corr(self.cov())[0]
+
+    def corr(self):
+        return _vol_corr(self.cov())[1]
+
+    def observation(self):
+        if not self.full:
+            raise ValueError(
+                f"Need {self.window} bars for an observation, have {self.count}"
+            )
+        vol, corr = _vol_corr(self.cov())
+        return _assemble(self.window_returns, vol, corr)
+
+
+def rolling_observations(returns, window=20):
+    # Batched equivalent of pushing every row through RollingWindowStats:
+    # entry k is the observation at t = k + window, built from
+    # returns[k : k + window]. Window sums come from cumulative sums, so the
+    # whole history costs O(T * n^2) rather than O(T * window * n^2).
+    returns = np.asarray(returns, dtype=np.float64)
+    n = returns.shape[1]
+
+    c1 = np.zeros((len(returns) + 1, n))
+    c2 = np.zeros((len(returns) + 1, n, n))
+    np.cumsum(returns, axis=0, out=c1[1:])
+    np.cumsum(np.einsum("ti,tj->tij", returns, returns), axis=0, out=c2[1:])
+
+    mean, cov = _moments(c1[window:] - c1[:-window], c2[window:] - c2[:-window], window)
+    vol, corr = _vol_corr(cov)
+
+    windows = sliding_window_view(returns, window, axis=0).transpose(0, 2, 1)
+    obs = _assemble(windows, vol, corr)
+
+    return obs, mean, cov
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+
+import numpy as np
+
+# -----------------------------
+# PERSISTENT SENTIMENT CACHE
+# Probability vectors keyed by sha256(model id + normalized text), in SQLite
+# so every Streamlit session and worker process shares one cache. Entries
+# expire after MAX_AGE_DAYS and the least recently used are evicted beyond
+# MAX_ENTRIES.
+# -----------------------------
+SENTIMENT_CACHE_PATH = os.getenv("SENTIMENT_CACHE_PATH", ".sentiment_cache.sqlite")
+MAX_ENTRIES = 200_000
+MAX_AGE_DAYS = 30
+
+
+def normalize_text(text):
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def text_key(text, model_id):
+    payload = f"{model_id}\0{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class SentimentCache:
+    def __init__(self, path=SENTIMENT_CACHE_PATH, max_entries=MAX_ENTRIES, max_age_days=MAX_AGE_DAYS):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sentiment ("
+                " key TEXT PRIMARY KEY,"
+                " model_id TEXT NOT NULL,"
+                " probs BLOB NOT NULL,"
+                " created REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS sentiment_last_used ON sentiment (last_used)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, keys):
+        # {key: probs} for the keys that are cached and not expired
+        if not keys:
+            return {}
+
+        now = time.time()
+        found = {}
+        unique = list(dict.fromkeys(keys))
+
+        with self._lock, self._connect() as conn:
+            for i in range(0, len(unique), 500):
+                chunk = unique[i : i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, probs FROM sentiment WHERE key IN ({marks}) AND created >= ?",
+                    (*chunk, now - self.max_age)
+                ).fetchall()
+                found.update((k, np.frombuffer(p, dtype=np.float32)) for k, p in rows)
+
+            conn.executemany(
+                "UPDATE sentiment SET last_used = ? WHERE key = ?",
+                [(now, k) for k in found]
+            )
+
+        self.hits += sum(k in found for k in keys)
+        self.misses += sum(k not in found for k in keys)
+        return found
+
+    def put_many(self, entries, model_id):
+        if not entries:
+            return
+
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sentiment VALUES (?, ?, ?, ?, ?)",
+                [
+                    (k, model_id, np.asarray(p, dtype=np.float32).tobytes(), now, now)
+                    for k, p in entries.items()
+                ]
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM sentiment WHERE created < ?", (now - self.max_age,))
+
+        (count,) = conn.execute("SELECT COUNT(*) FROM sentiment").fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM sentiment WHERE key IN ("
+                " SELECT key FROM sentiment ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM sentiment")
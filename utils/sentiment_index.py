@@ -0,0 +1,257 @@
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import cached
+from utils.finbert import LABELS, predict_sentiment
+
+# -----------------------------
+# STREAMING SENTIMENT INDEX
+# Article records (JSONL, one {"ticker", "publishedAt", "title",
+# "description"} object per line) are read in micro-batches, scored with
+# FinBERT and folded into per-ticker daily buckets of counts, sums and sums
+# of squares of the net score P(positive) - P(negative). Memory is bounded
+# by the batch size plus one row per ticker-day.
+#
+# The index is a single Parquet file of bucket totals whose metadata also
+# records how far into every source file it has read, so writing it is the
+# checkpoint: a restart resumes exactly after the last saved batch. Means,
+# dispersion and the EWM are derived when the index is read.
+# -----------------------------
+SENTIMENT_INDEX_PATH = Path(os.getenv("SENTIMENT_INDEX_PATH", ".sentiment_index.parquet"))
+BATCH_SIZE = 256  # articles per FinBERT micro-batch
+CHECKPOINT_EVERY = 20  # batches between index writes
+HALFLIFE_DAYS = 5.0
+POLL_INTERVAL = 5.0  # seconds between directory scans when following
+
+_CHECKPOINT_KEY = b"sentiment_index_offsets"
+_BUCKET_FIELDS = ["count", "score_sum", "score_sq_sum"] + [label.lower() for label in LABELS]
+
+
+def article_text(article):
+    return article["title"] + ". " + (article.get("description") or "")
+
+
+class SentimentIndex:
+    def __init__(self):
+        self.buckets = {}  # (ticker, date) -> [count, Σs, Σs², n_neg, n_neu, n_pos]
+        self.offsets = {}  # resolved source file -> bytes consumed
+        self.bad_lines = 0  # malformed records skipped this run
+
+    def update(self, tickers, dates, probs):
+        scores = probs[:, 2] - probs[:, 0]
+        labels = np.argmax(probs, axis=1)
+
+        for ticker, date, s, label in zip(tickers, dates, scores, labels):
+            bucket = self.buckets.get((ticker, date))
+            if bucket is None:
+                bucket = self.buckets[(ticker, date)] = np.zeros(len(_BUCKET_FIELDS))
+            bucket[:3] += (1, s, s * s)
+            bucket[3 + label] += 1
+
+    def frame(self):
+        # Bucket totals, one row per ticker-day. This is what a checkpoint
+        # persists; the derived columns come from index_frame() on load.
+        if not self.buckets:
+            return pd.DataFrame(columns=["ticker", "date"] + _BUCKET_FIELDS)
+
+        keys = list(self.buckets)
+        df = pd.DataFrame(np.array(list(self.buckets.values())), columns=_BUCKET_FIELDS)
+        df.insert(0, "date", pd.to_datetime([d for _, d in keys]))
+        df.insert(0, "ticker", [t for t, _ in keys])
+        return df
+
+    def save(self, path=None):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = Path(path or SENTIMENT_INDEX_PATH)
+        table = pa.Table.from_pandas(self.frame(), preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            _CHECKPOINT_KEY: json.dumps(self.offsets).encode()
+        })
+
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=None):
+        path = Path(path or SENTIMENT_INDEX_PATH)
+        index = cls()
+        if not path.exists():
+            return index
+
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path)
+        offsets = json.loads((table.schema.metadata or {}).get(_CHECKPOINT_KEY, b"{}"))
+        index.offsets = {_source_key(source): offset for source, offset in offsets.items()}
+
+        df = table.to_pandas()
+        dates = pd.to_datetime(df["date"]).dt.date
+        values = df[_BUCKET_FIELDS].to_numpy(dtype=np.float64, copy=True)
+        index.buckets = {(t, d): v for t, d, v in zip(df["ticker"], dates, values)}
+        return index
+
+
+def index_frame(buckets, halflife_days=HALFLIFE_DAYS):
+    # Daily index from bucket totals: adds the mean, dispersion (std of
+    # article scores that day) and a count-weighted exponentially decayed
+    # mean. Computed once per read, not at every checkpoint.
+    df = buckets.sort_values(["ticker", "date"], ignore_index=True)
+    df["mean"] = df["score_sum"] / df["count"]
+    df["dispersion"] = np.sqrt(np.maximum(df["score_sq_sum"] / df["count"] - df["mean"] ** 2, 0))
+    df["ewm"] = np.nan
+
+    for _, idx in df.groupby("ticker").indices.items():
+        days = df["date"].values[idx].astype("datetime64[D]").astype(np.int64)
+        decay = 0.5 ** (np.diff(days, prepend=days[0]) / halflife_days)
+        s_sum, s_count = df["score_sum"].values[idx], df["count"].values[idx]
+
+        num = den = 0.0
+        ewm = np.empty(len(idx))
+        for i in range(len(idx)):
+            num = num * decay[i] + s_sum[i]
+            den = den * decay[i] + s_count[i]
+            ewm[i] = num / den
+        df.loc[idx, "ewm"] = ewm
+
+    return df
+
+
+def _index_key(path=None, halflife_days=HALFLIFE_DAYS):
+    path = Path(path or SENTIMENT_INDEX_PATH)
+    return str(path), path.stat().st_mtime if path.exists() else None, halflife_days
+
+
+@cached(max_entries=4, key=_index_key)
+def load_sentiment_index(path=None, halflife_days=HALFLIFE_DAYS):
+    path = Path(path or SENTIMENT_INDEX_PATH)
+    if not path.exists():
+        return None
+    return index_frame(pd.read_parquet(path), halflife_days)
+
+
+def _source_key(path):
+    # The same file under a relative and an absolute path is one source
+    return str(Path(path).resolve())
+
+
+def _source_files(source):
+    source = Path(source)
+    if source.is_dir():
+        return sorted(source.glob("*.jsonl"))
+    return [source]
+
+
+def _read_new_records(path, offset, batch_size):
+    # Yields (records, end_offset, bad_lines) for complete lines past
+    # `offset`; a partially written last line is left for the next scan.
+    # Malformed lines are skipped (and counted) so they cannot stop every
+    # resume at the same spot.
+    with open(path, "rb") as f:
+        f.seek(offset)
+        start = offset
+        records, bad = [], 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if isinstance(record, dict):
+                    records.append(record)
+                else:
+                    bad += 1
+            if len(records) == batch_size:
+                yield records, offset, bad
+                start, records, bad = offset, [], 0
+        if offset > start:
+            yield records, offset, bad
+
+
+def _score_batch(index, records, tokenizer, model, cache):
+    records = [r for r in records if r.get("ticker") and r.get("title") and r.get("publishedAt")]
+    if not records:
+        return
+
+    _, probs = predict_sentiment([article_text(r) for r in records], tokenizer, model, cache=cache)
+    dates = pd.to_datetime([r["publishedAt"] for r in records], utc=True).date
+    index.update([r["ticker"] for r in records], dates, probs)
+
+
+def run_sentiment_pipeline(
+    source,
+    tokenizer,
+    model,
+    index_path=None,
+    batch_size=BATCH_SIZE,
+    checkpoint_every=CHECKPOINT_EVERY,
+    follow=False,
+    poll_interval=POLL_INTERVAL,
+    cache=None
+):
+    # Folds every unread record under `source` (a JSONL file or a directory
+    # of them) into the index at `index_path`. With follow=True it keeps
+    # polling for new files and appended lines until interrupted.
+    index = SentimentIndex.load(index_path)
+    pending = 0
+
+    # An interruption loses at most the batches since the last save; they
+    # are re-read on restart (and mostly served from the sentiment cache)
+    while True:
+        for path in _source_files(source):
+            key = _source_key(path)
+            for records, offset, bad in _read_new_records(path, index.offsets.get(key, 0), batch_size):
+                _score_batch(index, records, tokenizer, model, cache)
+                index.bad_lines += bad
+                index.offsets[key] = offset
+                pending += 1
+                if pending >= checkpoint_every:
+                    index.save(index_path)
+                    pending = 0
+
+        if pending:
+            index.save(index_path)
+            pending = 0
+        if not follow:
+            break
+        time.sleep(poll_interval)
+
+    return index
+
+
+if __name__ == "__main__":
+    from utils.finbert import load_finbert
+    from utils.sentiment_cache import SentimentCache
+
+    parser = argparse.ArgumentParser(description="Build the daily news sentiment index")
+    parser.add_argument("source", help="JSONL file or directory of JSONL files")
+    parser.add_argument("--index", default=str(SENTIMENT_INDEX_PATH))
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--follow", action="store_true", help="keep watching for new records")
+    args = parser.parse_args()
+
+    tokenizer, model = load_finbert(quantize=True)
+    index = run_sentiment_pipeline(
+        args.source,
+        tokenizer,
+        model,
+        index_path=args.index,
+        batch_size=args.batch_size,
+        follow=args.follow,
+        cache=SentimentCache()
+    )
+    print(f"{len(index.buckets)} ticker-days indexed -> {args.index}")
+    if index.bad_lines:
+        print(f"{index.bad_lines} malformed line(s) skipped")
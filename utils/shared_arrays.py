@@ -0,0 +1,110 @@
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from utils.rolling_stats import rolling_observations
+
+# -----------------------------
+# SHARED READ-ONLY DATASETS
+# One process writes an array into named shared memory; every worker that
+# receives the (pickled) handle maps the same pages instead of holding its
+# own copy. Only the name, shape and dtype cross the process boundary.
+# -----------------------------
+
+
+class SharedArray:
+    def __init__(self, name, shape, dtype):
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self._shm = None
+        self._owner = False
+
+    @classmethod
+    def from_array(cls, array, dtype=np.float32):
+        array = np.asarray(array, dtype=dtype)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=shm.buf)[...] = array
+
+        handle = cls(shm.name, array.shape, array.dtype)
+        handle._shm = shm
+        handle._owner = True
+        return handle
+
+    def __getstate__(self):
+        return {"name": self.name, "shape": self.shape, "dtype": self.dtype.str}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    @property
+    def nbytes(self):
+        return int(np.prod(self.shape)) * self.dtype.itemsize
+
+    def attach(self):
+        if self._shm is None:
+            # Workers started by the owner share its resource tracker, so
+            # attaching does not hand them ownership of the segment
+            self._shm = shared_memory.SharedMemory(name=self.name)
+        view = np.ndarray(self.shape, self.dtype, buffer=self._shm.buf)
+        view.flags.writeable = False
+        return view
+
+    def unlink(self):
+        # Owner only: frees the segment once every worker is done with it
+        if self._owner and self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                pass  # views still alive in this process; the mapping goes with them
+            self._shm.unlink()
+            self._shm = None
+
+
+def open_array(source, dtype=None):
+    # ndarray, .npy path (memory-mapped) or SharedArray -> ndarray view
+    if isinstance(source, SharedArray):
+        array = source.attach()
+    elif isinstance(source, (str, os.PathLike)):
+        array = np.load(source, mmap_mode="r")
+    else:
+        array = np.asarray(source)
+
+    if dtype is not None and array.dtype != dtype:
+        array = array.astype(dtype)
+    return array
+
+
+class SharedEnvData:
+    # Returns plus PortfolioEnv's precomputed rolling observations, mean and
+    # covariance, all in shared memory. The rolling arrays are several times
+    # larger than the returns, so sharing only the returns would still
+    # leave every worker rebuilding (and holding) its own copy of them.
+
+    def __init__(self, returns, window=20, dtype=np.float32, features=None):
+        returns = np.asarray(returns, dtype=np.float64)
+        obs, mean, cov = rolling_observations(returns, window)
+        if features is not None:
+            # Shared observations carry the features too (see utils.features)
+            from utils.features import as_feature_array, feature_observations
+            obs = feature_observations(obs, as_feature_array(features, *returns.shape), window)
+
+        self.window = window
+        self.returns = SharedArray.from_array(returns, dtype)
+        self.rolling = tuple(SharedArray.from_array(a, dtype) for a in (obs, mean, cov))
+
+    @property
+    def nbytes(self):
+        return self.returns.nbytes + sum(a.nbytes for a in self.rolling)
+
+    def unlink(self):
+        self.returns.unlink()
+        for array in self.rolling:
+            array.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.unlink()